@@ -1,5 +1,15 @@
 # HIGH-RADIX MONTGOMERY WITH VLNW
+# Uses the shared plan and context modules of rsa_montgomery/
+import os
 import random
+import sys
+
+if __name__ == "__main__":
+    # Run as a script: find rsa_montgomery/ from this file; importers set up their own path
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "rsa_montgomery"))
+
+from exponent_plan import NO_MULTIPLY, get_plan, precompute_base_powers
+from montgomery_context import get_context
 
 # -----------------------------
 # PARAMETERS
@@ -30,25 +40,10 @@ def words_to_int(words, w=WORD_BITS):
         x = (x << w) | words[i]
     return x
 
-def modinv(a, m):
-    """Modular inverse using extended Euclidean algorithm."""
-    g, x, y = extended_gcd(a, m)
-    if g != 1:
-        raise ValueError("No modular inverse")
-    return x % m
-
-def extended_gcd(a, b):
-    """Extended GCD algorithm."""
-    if b == 0:
-        return a, 1, 0
-    g, y, x = extended_gcd(b, a % b)
-    y -= (a // b) * x
-    return g, x, y
-
 # -----------------------------
 # High-Radix Montgomery Multiplication
 # -----------------------------
-def monpro_hr(a_bar, b_bar, n, w=WORD_BITS):
+def monpro_hr(a_bar, b_bar, n, w=WORD_BITS, ctx=None):
     """
     High-Radix Montgomery multiplication:
     Computes a_bar * b_bar * R^-1 mod n
@@ -56,12 +51,16 @@ def monpro_hr(a_bar, b_bar, n, w=WORD_BITS):
     global mul_count
     mul_count += 1
 
-    # Precompute n0_inv = -n0^-1 mod 2^w
-    n0 = n & ((1 << w) - 1)
-    n0_inv = (-modinv(n0, 1 << w)) & ((1 << w) - 1)
+    # n0_inv = -n0^-1 mod 2^w, computed once per modulus by the context
+    if ctx is None:
+        ctx = get_context(n, word_bits=w)
+    elif ctx.word_bits != w:
+        raise ValueError(f"Context has {ctx.word_bits}-bit words, expected {w}")
+    n0_inv = ctx.n0_inv
+    s = ctx.r_bits // w  # one pass per word of R, also when a_bar has leading zero words
     A = int_to_words(a_bar, w)
+    A += [0] * (s - len(A))
     B = int_to_words(b_bar, w)
-    s = len(A)
     u = 0
 
     for i in range(s):
@@ -80,94 +79,57 @@ def monpro_hr(a_bar, b_bar, n, w=WORD_BITS):
 # -----------------------------
 # Conversions to/from Montgomery domain
 # -----------------------------
-def to_montgomery(a, n):
-    return (a << R_BITS) % n
+def to_montgomery(a, n, ctx=None):
+    if ctx is None:
+        ctx = get_context(n)
+    return ctx.to_montgomery(a)  # MonPro(a, R^2 mod n), no 512-bit %
 
-def from_montgomery(a_bar, n):
-    return monpro_hr(a_bar, 1, n)  # multiply by 1 in HR-MonPro
-
-# -----------------------------
-# VLNW schedule generator
-# -----------------------------
-def vlnw_schedule(exponent: int, d):
-    d = 4
-    e_bits = bin(exponent)[2:][::-1]  # LSB first
-    schedule = []
-    i = 0
-    while i < len(e_bits):
-        if e_bits[i] == '0':
-            schedule.append((0, 1))
-            i += 1
-        else:
-            win_len = min(d, len(e_bits) - i)
-            val = 0
-            for j in range(win_len):
-                val |= (int(e_bits[i + j]) << j)
-            schedule.append((val, win_len))
-            i += win_len
-    # print(schedule)
-    # print(len(schedule))
-
-    return schedule
-
-# -----------------------------
-# Precompute odd powers of base
-# -----------------------------
-def precompute_base_powers(base_bar, modulus, d):
-    max_w = (1 << d) - 1
-    powers = {1: base_bar}
-    M2 = monpro_hr(base_bar, base_bar, modulus)
-    for w in range(3, max_w + 1, 2):
-        powers[w] = monpro_hr(powers[w - 2], M2, modulus)
-    return powers
+def from_montgomery(a_bar, n, ctx=None):
+    return monpro_hr(a_bar, 1, n, ctx=ctx)  # multiply by 1 in HR-MonPro
 
 def very_high_level_monpro(a, b, n):
     return a * b * pow(1 << R_BITS, -1, n) % n
 # -----------------------------
 # VLNW Montgomery exponentiation (High-Radix)
 # -----------------------------
-def montgomery_pow_vlnw_hr(msgin_data, exponent, modulus, d):
+def montgomery_pow_vlnw_hr(msgin_data, exponent, modulus, d, ctx=None):
     if modulus == 1:
         return 0
     if exponent == 0:
         return 1 % modulus
+    if ctx is None:
+        ctx = get_context(modulus)
 
-    msgin_data_bar = to_montgomery(msgin_data, modulus)
+    msgin_data_bar = to_montgomery(msgin_data, modulus, ctx)
 
-    powers = precompute_base_powers(msgin_data_bar, modulus, d)
+    plan = get_plan(exponent, d)  # compiled once, reused for every message
+    powers = precompute_base_powers(msgin_data_bar, lambda a, b: monpro_hr(a, b, modulus, ctx=ctx), plan)
     # print("Message:", hex(msgin_data))
     # print("Message_bar:",hex(msgin_data_bar))
     # print(len(powers), "precomputed powers")
     # print("Precomputed powers:")
     # for w, p in powers.items():
     #     print(f"  M^{w} mod n: {hex(p)}")
-    schedule = vlnw_schedule(exponent, d)
-
-    # Initialize accumulator to the most significant non-zero window (step 3)
-    windows = list(reversed(schedule))
-    # Find first non-zero window (should be windows[0], but guard just in case)
-    start_idx = 0
-    while start_idx < len(windows) and windows[start_idx][0] == 0:
-        start_idx += 1
-    if start_idx == len(windows):
-        return 1 % modulus  # exponent was zero (already handled), safe guard
-    
-    acc = powers[windows[start_idx][0]]  # C := M^{F_{k-1}} in Montgomery domain
-    start_idx += 1
+
+    # Initialize accumulator to the most significant window (step 3),
+    # the first op of a plan always multiplies
+    ops = iter(plan)
+    _, first = next(ops)
+    acc = powers[2 * first + 1]  # C := M^{F_{k-1}} in Montgomery domain
     # print(hex(acc))
     # Process remaining windows (steps 4a, 4b)
-    for win_val, win_len in windows[start_idx:]:
+    for win_len, t in ops:
         for _ in range(win_len):
-            acc = monpro_hr(acc, acc, modulus)  # square L(Fi) times
-        if win_val != 0:
+            acc = monpro_hr(acc, acc, modulus, ctx=ctx)  # square L(Fi) times
+        if t != NO_MULTIPLY:
             # print("acc prev",hex(acc))
             # print("mult", hex(powers[win_val]))
             # print("Very high level monpro:\nacc", hex(very_high_level_monpro(acc, powers[win_val], modulus)))
-            acc = monpro_hr(acc, powers[win_val], modulus)  # multiply by M^{Fi}
+            acc = monpro_hr(acc, powers[2 * t + 1], modulus, ctx=ctx)  # multiply by M^{Fi}
             # print("acc", hex(acc), '\n')
             
 
-    return from_montgomery(acc, modulus)
+    return from_montgomery(acc, modulus, ctx)
 
 # -----------------------------
 # -----------------------------
@@ -0,0 +1,211 @@
+# ACCELERATOR EMULATOR
+# Software rsa_acc (rsa_regio MMIO) + rsa_dma: runs the exponentiation.vhd flow off the registers
+import numpy as np
+
+from hw_schedule import HW_FORMAT, unpack_schedule
+from monpro_numpy import LIMBS, ints_to_limbs, monpro_limbs
+from monpro_pipeline import TABLE_SIZE
+from msg_convert import C_BLOCKSIZE_IN_32_BIT_WORDS
+from pynq_mock import MockChannel, MockDMA, MockMMIO
+from register_file import REGIO_MAP, SCHEDULE_REGISTERS
+from throughput_model import DatapathConfig, file_estimate
+
+
+class EmulatorError(RuntimeError):
+    """The register contents would make exponentiation.vhd fail its assertions."""
+
+
+class _SendChannel(MockChannel):
+    """Send channel that sets the transfer latency from the cycle model when a transfer starts."""
+
+    def transfer(self, buffer):
+        super().transfer(buffer)
+        emulator = self._dma.emulator
+        blocks = len(buffer) // C_BLOCKSIZE_IN_32_BIT_WORDS
+        self._dma.latency = emulator.transfer_seconds(blocks) * emulator.time_scale
+
+
+class EmulatedAccelerator:
+    """
+    rsa_acc and rsa_dma of the rsa_soc overlay, in software.
+
+    mmio is the rsa_regio register file (REGIO_MAP layout) and dma the
+    send/recv channel pair, so host code written against
+    overlay.rsa.rsa_acc.mmio and overlay.rsa.rsa_dma runs unchanged:
+
+        acc = EmulatedAccelerator()
+        rsammio, dma = acc.mmio, acc.dma
+
+    Every DMA transfer is computed like exponentiation.vhd from the register
+    contents only: toMont(A) and toMont(1) with R2_MOD_N, the A^1, A^3..A^15
+    table, the main loop driven by the decoded vlnw_schedule_0..2 (L squarings,
+    then a multiply by the table entry of u when u != 0), and fromMont. Each
+    MonPro uses the N_PRIME register, so a wrong R2_MOD_N or N_PRIME gives
+    wrong results, as on the board. key_e_d is stored but, as in hardware, not
+    used by the datapath.
+
+    The modelled time of a transfer follows throughput_model with
+    cycles_per_monpro; the DMA wait sleeps that time multiplied by time_scale
+    (0 = return at once).
+    """
+
+    def __init__(self, cycles_per_monpro=None, clock_hz=75e6, cores=1, time_scale=0.0, config=None):
+        self.config = config or DatapathConfig(clock_hz=clock_hz, cores=cores, monpro_cycles=cycles_per_monpro)
+        self.time_scale = time_scale
+        self.mmio = MockMMIO()
+        self.dma = MockDMA(self.mmio, process=self._process)
+        self.dma.emulator = self
+        self.dma.sendchannel = _SendChannel(self.dma)
+        self.transfers = 0
+        self.blocks = 0
+        self.modeled_cycles = 0
+
+    def register(self, name):
+        offset, size = REGIO_MAP[name]
+        if size == 1:
+            return int(self.mmio.array[offset // 4])
+        return self.mmio.block(offset)
+
+    def schedule(self):
+        """MSB-first (u, L) entries decoded from the three schedule registers."""
+        regs = tuple(self.register(name) for name in SCHEDULE_REGISTERS)
+        try:
+            entries = unpack_schedule(regs, HW_FORMAT)
+        except ValueError as err:
+            raise EmulatorError(str(err)) from None
+        for u, _ in entries:
+            if u and not u & 1:
+                raise EmulatorError(f"VLNW addr invalid for multiply: u = {u}")
+        return entries
+
+    def transfer_seconds(self, blocks):
+        """Modelled time of one DMA transfer of blocks with the current schedule registers."""
+        if not blocks:
+            return 0.0
+        regs = tuple(self.register(name) for name in SCHEDULE_REGISTERS)
+        return file_estimate(regs, blocks, self.config)['file_ms'] / 1e3
+
+    def exponentiate(self, words):
+        """(N, 8) message words -> result words, following the exponentiation.vhd states."""
+        n = self.register('key_n')
+        n_prime = self.register('n_prime')
+        r2 = ints_to_limbs([self.register('r2_mod_n')])
+        entries = self.schedule()
+
+        def monpro(a, b):
+            return monpro_limbs(a, b, n, n_prime=n_prime)
+
+        acc = monpro(words, r2)                                 # S_TO_MONT_A
+        one_m = monpro(ints_to_limbs([1]), r2)                  # S_TO_MONT_ONE
+        table = [acc]
+        a2 = monpro(acc, acc)                                   # S_A2
+        for _ in range(TABLE_SIZE - 1):                         # S_A3, S_GEN_ODD
+            table.append(monpro(table[-1], a2))
+        acc = np.repeat(one_m, len(words), axis=0)              # S_LOAD_VLNW
+        for u, L in entries:
+            for _ in range(L):
+                acc = monpro(acc, acc)                          # S_OP_SQ
+            if u:
+                acc = monpro(acc, table[u >> 1])                # S_OP_MUL
+        return monpro(acc, ints_to_limbs([1]))                  # S_FROM_MONT
+
+    def _process(self, words, mmio):
+        blocks = words.reshape(-1, LIMBS)
+        self.transfers += 1
+        self.blocks += len(blocks)
+        self.modeled_cycles += round(self.transfer_seconds(len(blocks)) * self.config.clock_hz)
+        if not len(blocks):
+            return words
+        return self.exponentiate(blocks).reshape(-1)
+
+    @property
+    def modeled_seconds(self):
+        return self.modeled_cycles / self.config.clock_hz
+
+    def __repr__(self):
+        return (f"EmulatedAccelerator({self.config}, transfers={self.transfers}, "
+                f"blocks={self.blocks}, modeled={self.modeled_seconds * 1e3:.2f} ms)")
+
+
+# -----------------------------
+# Simple test: host driver code against the emulator
+# -----------------------------
+if __name__ == "__main__":
+    import asyncio
+    import time
+
+    from accelerator_session import AcceleratorSession
+    from async_session import AsyncAcceleratorSession
+    from hex_vectors import HexVectorFile, test_files
+    from key_registry import get_key_context, key_loader
+    from msg_convert import msg2word, word2msg
+    from pynq_mock import mock_allocate
+    from register_file import RegisterFile
+    from throughput_model import MEASURED_BLOCK_CYCLES, block_cycles
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+
+    acc = EmulatedAccelerator()
+    rsammio, dma = acc.mmio, acc.dma
+
+    # Notebook-style write_blockreg/read_blockreg, one word per bus access
+    def write_blockreg(address, block):
+        for k, data in enumerate(msg2word([block])):
+            rsammio.write(address + 4 * k, int(data))
+
+    def read_blockreg(address):
+        return word2msg([rsammio.read(address + 4 * k) for k in range(C_BLOCKSIZE_IN_32_BIT_WORDS)])[0]
+
+    write_blockreg(0x00, key_n)
+    write_blockreg(0x20, key_e)
+    assert (read_blockreg(0x00), read_blockreg(0x20)) == (key_n, key_e), "test_write_read_keys: FAILED"
+
+    # Decrypt the ct files through AcceleratorSession with the keys from the registry
+    regs = RegisterFile(rsammio)
+    session = AcceleratorSession(dma, allocate=mock_allocate)
+    start = time.time()
+    for path in test_files()[:3]:
+        with HexVectorFile(path, sidecar=False) as vectors:
+            exponent, schedule = vectors.key_schedule()
+            key = get_key_context(exponent, key_n)
+            assert key.schedule == schedule
+            key.load(regs)
+            out, _ = session.crypt(list(vectors))
+            assert out == [pow(m, exponent, key_n) for m in vectors], "Emulated decryption mismatch!"
+    elapsed = time.time() - start
+    d_cycles = block_cycles(get_key_context(key_d, key_n).schedule, acc.config)['total']
+    assert abs(d_cycles - MEASURED_BLOCK_CYCLES) / MEASURED_BLOCK_CYCLES < 0.01
+    print(f"{acc}: {acc.blocks} blocks in {elapsed:.2f} s wall")
+
+    # Wrong N_PRIME gives wrong results, a bad schedule stops the transfer
+    rsammio.write(REGIO_MAP['n_prime'][0], 0x12345678)
+    out, _ = session.crypt([5])
+    assert out != [pow(5, key_d, key_n)]
+    regs.invalidate()
+    get_key_context(key_d, key_n).load(regs)
+    assert session.crypt([5])[0] == [pow(5, key_d, key_n)]
+    bad = EmulatedAccelerator()
+    bad.mmio.write(REGIO_MAP['vlnw_schedule_0'][0] + 28, (1 << 25) | (2 << 21))  # one entry, u = 2
+    try:
+        bad.exponentiate(ints_to_limbs([5]))
+        raise AssertionError("Even multiply index was accepted")
+    except EmulatorError:
+        pass
+
+    # Async session with per-job key loads and modelled latency, 1000x faster than the board
+    fast = EmulatedAccelerator(cycles_per_monpro=122, cores=7, time_scale=1e-3)
+
+    async def main():
+        async with AsyncAcceleratorSession(fast.dma, key_loader(RegisterFile(fast.mmio)),
+                                           allocate=mock_allocate) as s:
+            msgs = list(range(2, 200))
+            c, _ = await s.encrypt(key_e, key_n, msgs)
+            m, _ = await s.decrypt(key_d, key_n, c)
+            return msgs, c, m
+
+    msgs, c, m = asyncio.run(main())
+    assert c == [pow(x, key_e, key_n) for x in msgs] and m == msgs
+    print(f"{fast}: 7 cores, {fast.modeled_seconds * 1e3:.2f} ms modelled")
+    print("Accelerator emulator test passed!")
@@ -0,0 +1,258 @@
+# ACCELERATOR SESSION
+# Reusable hw_encrypt/hw_decrypt driver that keeps its contiguous DMA buffers across calls
+import time
+
+import numpy as np
+
+from msg_convert import C_BLOCKSIZE_IN_32_BIT_WORDS, msg2word, word2msg
+
+# Smallest buffer size class, in 32-bit words (128 blocks)
+MIN_POOL_WORDS = 1024
+
+# Blocks per DMA transfer when streaming a file
+STREAM_CHUNK_BLOCKS = 4096
+
+
+def cma_allocate(words):
+    """Allocate a physically contiguous uint32 buffer on the board."""
+    try:
+        from pynq import allocate
+        return allocate(shape=(words,), dtype=np.uint32)
+    except ImportError:
+        from pynq import Xlnk  # older PYNQ images
+        return Xlnk().cma_array(shape=(words,), dtype=np.uint32)
+
+
+class BufferPool:
+    """
+    Contiguous buffers grouped in power-of-two size classes.
+    acquire() reuses a free buffer of the right class or allocates a new one.
+    """
+
+    def __init__(self, allocate=cma_allocate, min_words=MIN_POOL_WORDS):
+        self._allocate = allocate
+        self.min_words = min_words
+        self._free = {}
+        self.allocations = 0
+
+    def size_class(self, words):
+        size = self.min_words
+        while size < words:
+            size <<= 1
+        return size
+
+    def acquire(self, words):
+        size = self.size_class(words)
+        free = self._free.setdefault(size, [])
+        if free:
+            return free.pop()
+        self.allocations += 1
+        return self._allocate(size)
+
+    def release(self, buffer):
+        self._free.setdefault(len(buffer), []).append(buffer)
+
+    def close(self):
+        for free in self._free.values():
+            for buffer in free:
+                if hasattr(buffer, "freebuffer"):
+                    buffer.freebuffer()
+                elif hasattr(buffer, "close"):
+                    buffer.close()
+        self._free.clear()
+
+
+class DmaJob:
+    """An input/output buffer pair from the pool, sized for num_blocks."""
+
+    def __init__(self, in_buffer, out_buffer, num_blocks):
+        self._buffers = (in_buffer, out_buffer)
+        self.capacity = len(in_buffer) // C_BLOCKSIZE_IN_32_BIT_WORDS
+        self.exec_time = None
+        self.resize(num_blocks)
+
+    def resize(self, num_blocks):
+        """Use the first num_blocks of the buffers for the next transfer."""
+        if num_blocks > self.capacity:
+            raise ValueError("Job buffers are too small")
+        words = num_blocks * C_BLOCKSIZE_IN_32_BIT_WORDS
+        in_buffer, out_buffer = self._buffers
+        self.num_blocks = num_blocks
+        self.input = in_buffer[:words]    # fill this in place
+        self.output = out_buffer[:words]  # valid after AcceleratorSession.run()/wait()
+
+
+class AcceleratorSession:
+    """
+    Keeps a pool of DMA buffers alive between hw_encrypt/hw_decrypt calls.
+
+    session = AcceleratorSession(dma)
+    C_array, hw_exec_time = session.crypt(M_array)
+
+    or, to fill the input buffer in place:
+    job = session.job(num_blocks); msg2word(M_array, out=job.input)
+    session.run(job); ...job.output...; session.release(job)
+    """
+
+    def __init__(self, dma, allocate=cma_allocate, min_words=MIN_POOL_WORDS):
+        self.dma = dma
+        self.pool = BufferPool(allocate, min_words)
+
+    def job(self, num_blocks):
+        words = num_blocks * C_BLOCKSIZE_IN_32_BIT_WORDS
+        return DmaJob(self.pool.acquire(words), self.pool.acquire(words), num_blocks)
+
+    def start(self, job):
+        """Start the DMA transfers of a job without waiting for it."""
+        job._start_time = time.time()
+        self.dma.sendchannel.transfer(job.input)
+        self.dma.recvchannel.transfer(job.output)
+
+    def wait(self, job):
+        """Wait for a started job; returns its runtime."""
+        self.dma.recvchannel.wait()
+        job.exec_time = time.time() - job._start_time
+        return job.exec_time
+
+    def run(self, job):
+        """Send job.input through the accelerator into job.output; returns the runtime."""
+        self.start(job)
+        return self.wait(job)
+
+    def release(self, job):
+        for buffer in job._buffers:
+            self.pool.release(buffer)
+        job._buffers = ()
+
+    def crypt(self, M_array):
+        """Same contract as the notebook's hw_encrypt after write_keys: (C_array, hw_exec_time)."""
+        M_array = M_array if hasattr(M_array, "__len__") else list(M_array)
+        job = self.job(len(M_array))
+        try:
+            msg2word(M_array, out=job.input)
+            hw_exec_time = self.run(job)
+            C_array = word2msg(job.output)
+        finally:
+            self.release(job)
+        return C_array, hw_exec_time
+
+    def crypt_file(self, src_path, dst_path, chunk_blocks=STREAM_CHUNK_BLOCKS):
+        """
+        Stream a word file (np.fromfile layout) through the accelerator into dst_path.
+
+        The input is memory mapped and sent in chunks of chunk_blocks, ping-ponging
+        between two buffer pairs: while the accelerator works on chunk k, the host
+        writes out chunk k-1 and copies in chunk k+1. Memory use is two buffer
+        pairs regardless of file size. Returns (blocks, total wall time).
+        """
+        words_per_chunk = chunk_blocks * C_BLOCKSIZE_IN_32_BIT_WORDS
+        src = np.memmap(src_path, dtype="<u4", mode="r")
+        if len(src) % C_BLOCKSIZE_IN_32_BIT_WORDS != 0:
+            raise ValueError("The file size must be aligned to the block size of 256 bit")
+        num_blocks = len(src) // C_BLOCKSIZE_IN_32_BIT_WORDS
+        chunk_starts = range(0, len(src), words_per_chunk)
+
+        def load(job, start):
+            chunk = src[start:start + words_per_chunk]
+            job.resize(len(chunk) // C_BLOCKSIZE_IN_32_BIT_WORDS)
+            np.copyto(job.input, chunk)
+
+        start_time = time.time()
+        jobs = [self.job(chunk_blocks), self.job(chunk_blocks)]
+        try:
+            with open(dst_path, "wb") as dst:
+                if num_blocks:
+                    load(jobs[0], 0)
+                    self.start(jobs[0])
+                for k in range(len(chunk_starts)):
+                    current, following = jobs[k % 2], jobs[(k + 1) % 2]
+                    if k + 1 < len(chunk_starts):
+                        load(following, chunk_starts[k + 1])  # overlaps with chunk k
+                    self.wait(current)
+                    if k + 1 < len(chunk_starts):
+                        self.start(following)
+                    current.output.tofile(dst)                # overlaps with chunk k+1
+        finally:
+            for job in jobs:
+                self.release(job)
+            del src
+        return num_blocks, time.time() - start_time
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -----------------------------
+# Simple test against the mock DMA
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    from pynq_mock import MockDMA, MockMMIO, mock_allocate
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    mmio = MockMMIO()
+    mmio.array[:8] = msg2word([key_n])
+    dma = MockDMA(mmio)
+
+    with AcceleratorSession(dma, allocate=mock_allocate) as session:
+        # Small test cases reuse the same pair of buffers
+        for count in (2, 63, 18, 63, 2, 18):
+            M = [random.getrandbits(255) for _ in range(count)]
+            C, _ = session.crypt(M)
+            assert C == [m ^ key_n for m in M], "XOR loopback failed!"
+        assert session.pool.allocations == 2, "Small jobs should share one buffer pair"
+
+        # A larger file grows the pool by one size class
+        M = [random.getrandbits(255) for _ in range(882)]
+        C, _ = session.crypt(M)
+        assert C == [m ^ key_n for m in M]
+        assert session.pool.allocations == 4
+
+        # In-place fill
+        job = session.job(len(M))
+        msg2word(M, out=job.input)
+        session.run(job)
+        assert word2msg(job.output) == C
+        session.release(job)
+        assert session.pool.allocations == 4
+
+        # Stream a file in chunks through two buffer pairs, on a DMA that takes time
+        import os
+        import tempfile
+
+        dma.latency = 0.005
+        jobs, overlapped = [], []
+        new_job, dma_wait = session.job, dma.recvchannel.wait
+
+        def job(num_blocks):
+            jobs.append(new_job(num_blocks))
+            return jobs[-1]
+
+        def wait():
+            # Chunk k+1 must already be in the idle buffer pair while chunk k is in flight
+            k = len(overlapped)
+            idle = next(j for j in jobs[-2:] if j.input is not dma.sendchannel.buffer)
+            next_chunk = src_words[(k + 1) * 128 * 8:(k + 2) * 128 * 8]
+            overlapped.append(len(next_chunk) > 0 and np.array_equal(idle.input, next_chunk))
+            dma_wait()
+
+        session.job, dma.recvchannel.wait = job, wait
+        with tempfile.TemporaryDirectory() as tmp:
+            src, dst = os.path.join(tmp, "pt1_in.bin"), os.path.join(tmp, "ct1_out.bin")
+            M = [random.getrandbits(255) for _ in range(1000)]
+            src_words = msg2word(M)
+            src_words.tofile(src)
+            blocks, _ = session.crypt_file(src, dst, chunk_blocks=128)
+            assert blocks == len(M)
+            assert word2msg(np.fromfile(dst, dtype=np.uint32)) == [m ^ key_n for m in M], "Streaming failed!"
+        assert overlapped == [True] * 7 + [False], "Next chunk was not loaded during the transfer!"
+        session.job, dma.recvchannel.wait = new_job, dma_wait
+
+    print("Accelerator session test passed!")
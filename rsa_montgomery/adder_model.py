@@ -0,0 +1,193 @@
+# LIMB ADDER MODEL
+# Carry-chain and timing proxy of the 288-bit MonPro accumulate for different adder splits
+import numpy as np
+
+from hw_schedule import encode_exponent
+from monpro_pipeline import AIB, MN, OUTPUT_STAGES, U0NP, WORDS, step_values
+from monpro_trace import random_cases
+from montgomery_context import R_BITS, get_context
+from throughput_model import DatapathConfig, block_cycles
+
+ADD_WIDTH = 288         # P (32 x 256) + U accumulate in monpro.vhd
+
+# Measured design of the "39880 cycles" note: 2 x 144 adders and an unsplit U - n subtractor at 75 MHz
+MEASURED_CLOCK_MHZ = 75
+MEASURED_OUTPUT_STAGES = 1
+
+# Timing proxy, calibrated so the (R_BITS + 1)-bit subtractor of the measured design runs at MEASURED_CLOCK_MHZ
+T_FIXED_NS = 1.5                                     # clock-to-out, LUT and setup
+T_CARRY_BIT_NS = ((1e3 / MEASURED_CLOCK_MHZ - T_FIXED_NS)
+                  / -(-(R_BITS + 1) // MEASURED_OUTPUT_STAGES))  # per bit of carry chain, routing included
+
+# Non-adder stages of the MonPro pipeline: fetch, multiply, write
+OTHER_STAGES = 3
+
+
+class AdderConfig:
+    """
+    A split of the ADD_WIDTH accumulate into limb_bits-wide adders.
+
+    lanes limbs are chained combinationally in one pipeline stage and the carry
+    between stages is registered, so the add takes pipeline_registers stages
+    (lanes * pipeline_registers >= number of limbs). With carry_save, limb
+    carries are never rippled: every limb keeps its carry out for the next
+    accumulate and the redundant U is resolved once in the output stages,
+    costing resolve_cycles extra per MonPro.
+    """
+
+    def __init__(self, limb_bits, lanes, pipeline_registers, carry_save=False, width=ADD_WIDTH):
+        self.limb_bits = limb_bits
+        self.lanes = lanes
+        self.pipeline_registers = pipeline_registers
+        self.carry_save = carry_save
+        self.width = width
+        self.limbs = -(-width // limb_bits)
+        if lanes * pipeline_registers < self.limbs:
+            raise ValueError("lanes * pipeline_registers must cover every limb")
+
+    @property
+    def segment_bits(self):
+        """Bits a carry can ripple through without meeting a register."""
+        return self.limb_bits if self.carry_save else self.limb_bits * self.lanes
+
+    @property
+    def resolve_cycles(self):
+        return -(-self.width // (self.limb_bits * self.lanes)) if self.carry_save else 0
+
+    def __repr__(self):
+        kind = "carry-save" if self.carry_save else "ripple"
+        return f"{self.limbs}x{self.limb_bits}b {kind}, {self.lanes} lane(s)/stage, {self.pipeline_registers} stage(s)"
+
+
+def to_bits(values, width=ADD_WIDTH):
+    """List of ints -> (N, width) bool array, bit 0 first."""
+    nbytes = -(-width // 8)
+    raw = np.frombuffer(b"".join(v.to_bytes(nbytes, "little") for v in values), dtype=np.uint8)
+    return np.unpackbits(raw.reshape(len(values), nbytes), axis=1, bitorder="little")[:, :width].astype(bool)
+
+
+def carry_chains(a_bits, b_bits, segment_bits):
+    """
+    Longest carry ripple per addition, vectorized over rows.
+
+    A carry generated at bit i (a & b) travels up through the propagate
+    bits (a ^ b) above it; at a segment boundary the carry is registered and
+    its chain restarts. Returns the longest chain in bits for every row.
+    """
+    g = a_bits & b_bits
+    p = a_bits ^ b_bits
+    rows, width = g.shape
+    carry = np.zeros(rows, dtype=bool)
+    run = np.zeros(rows, dtype=np.int32)
+    longest = np.zeros(rows, dtype=np.int32)
+    for i in range(width):
+        if i % segment_bits == 0:
+            run = carry.astype(np.int32)   # registered carry in
+        ripple = p[:, i] & carry
+        run = np.where(ripple, run + 1, np.where(g[:, i], 1, 0))
+        carry = g[:, i] | ripple
+        longest = np.maximum(longest, run)
+    return longest
+
+
+def monpro_additions(count, modulus, seed=None):
+    """(P, U) operands of the AiB and mn accumulates of count random MonPros."""
+    n_prime = get_context(modulus).n0_inv
+    ps, us = [], []
+    for a, b in random_cases(count, modulus, seed):
+        U = M = 0
+        for i in range(WORDS):
+            for step in (AIB, U0NP, MN):
+                U_in = U
+                U, M, values = step_values(step, a, b, U, M, i, modulus, n_prime)
+                if step != U0NP:
+                    ps.append(values['P'])
+                    us.append(U_in)
+    return ps, us
+
+
+def chain_ns(bits):
+    """Timing proxy of a register-to-register path through a bits-long carry chain."""
+    return T_FIXED_NS + bits * T_CARRY_BIT_NS
+
+
+def evaluate(config, p_bits, u_bits, exponent=None, output_stages=OUTPUT_STAGES):
+    """
+    Carry-chain statistics and timing proxies of one adder configuration.
+
+    The clock is set by the slower of the accumulate stage and the final
+    U - n subtractor, split over output_stages (257 bits, as in monpro.vhd).
+    With an exponent, the MonPro length and block time at that clock follow
+    from throughput_model.
+    """
+    chains = carry_chains(p_bits, u_bits, config.segment_bits)
+    worst_static = config.segment_bits + 1
+    adder_ns = chain_ns(worst_static)
+    subtract_ns = chain_ns(-(-(R_BITS + 1) // output_stages))
+    report = {
+        'config': repr(config),
+        'stages': config.pipeline_registers,
+        'static_chain_bits': worst_static,
+        'observed_max_chain': int(chains.max()),
+        'observed_mean_chain': float(chains.mean()),
+        'adder_ns': adder_ns,
+        'subtract_ns': subtract_ns,
+        'fmax_mhz': 1e3 / max(adder_ns, subtract_ns),
+    }
+    if exponent is not None:
+        datapath = DatapathConfig(clock_hz=report['fmax_mhz'] * 1e6,
+                                  stages=OTHER_STAGES + config.pipeline_registers,
+                                  output_stages=output_stages + config.resolve_cycles)
+        cycles = block_cycles(encode_exponent(exponent), datapath)['total']
+        report['monpro_cycles'] = datapath.monpro_cycles
+        report['block_us'] = cycles / datapath.clock_hz * 1e6
+    return report
+
+
+# -----------------------------
+# Compare adder splits
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+
+    # Chain detector against a bit-serial reference
+    a = [random.getrandbits(ADD_WIDTH) for _ in range(200)] + [(1 << ADD_WIDTH) - 1]
+    b = [random.getrandbits(ADD_WIDTH) for _ in range(200)] + [1]
+    got = carry_chains(to_bits(a), to_bits(b), ADD_WIDTH)
+    for x, y, chain in zip(a, b, got):
+        best = run = carry = 0
+        for i in range(ADD_WIDTH):
+            xi, yi = (x >> i) & 1, (y >> i) & 1
+            run = run + 1 if (xi ^ yi) and carry else (1 if xi & yi else 0)
+            carry = (xi & yi) | ((xi ^ yi) & carry)
+            best = max(best, run)
+        assert chain == best, "Carry chain mismatch!"
+    assert got[-1] == ADD_WIDTH  # all ones + 1 ripples through everything
+
+    ps, us = monpro_additions(500, key_n, seed=1)
+    p_bits, u_bits = to_bits(ps), to_bits(us)
+
+    # The measured design (monpro.vhd adders, subtractor not split yet) runs at the measured clock
+    baseline = evaluate(AdderConfig(144, 1, 2), p_bits, u_bits, output_stages=MEASURED_OUTPUT_STAGES)
+    assert abs(baseline['fmax_mhz'] - MEASURED_CLOCK_MHZ) < 1e-9, "Timing proxy is off the measured clock!"
+    configs = [
+        AdderConfig(288, 1, 1),                  # one 288-bit adder
+        AdderConfig(144, 1, 2),                  # monpro.vhd: 2 x 144
+        AdderConfig(72, 2, 2),                   # 4 x 72, two per stage
+        AdderConfig(72, 1, 4),                   # monpro5_4x72bit_adder.vhd
+        AdderConfig(36, 2, 4),
+        AdderConfig(72, 4, 1, carry_save=True),  # 4 x 72 carry-save, one stage
+        AdderConfig(36, 8, 1, carry_save=True),
+    ]
+    print(f"Measured design, U - n subtractor in {MEASURED_OUTPUT_STAGES} stage: {baseline['fmax_mhz']:.0f} MHz")
+    print(f"{len(ps)} MonPro accumulates, U - n subtractor over {OUTPUT_STAGES} stages: "
+          f"{1e3 / chain_ns(-(-(R_BITS + 1) // OUTPUT_STAGES)):.0f} MHz")
+    for config in configs:
+        r = evaluate(config, p_bits, u_bits, key_d)
+        assert r['observed_max_chain'] <= r['static_chain_bits']
+        print(f"  {r['config']:46s} chain {r['static_chain_bits']:3d} static / {r['observed_max_chain']:3d} seen "
+              f"(mean {r['observed_mean_chain']:4.1f}), adder {r['adder_ns']:5.2f} ns -> {r['fmax_mhz']:4.0f} MHz, "
+              f"MonPro {r['monpro_cycles']} cycles, key_d block {r['block_us']:6.1f} us")
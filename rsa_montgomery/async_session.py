@@ -0,0 +1,193 @@
+# ASYNC ACCELERATOR SESSION
+# asyncio hw_encrypt/hw_decrypt: jobs are queued on the DMA and completed on interrupt instead of polling
+import asyncio
+import time
+
+from accelerator_session import MIN_POOL_WORDS, AcceleratorSession, cma_allocate
+from msg_convert import msg2word, word2msg
+
+
+class AsyncAcceleratorSession:
+    """
+    Queue of accelerator jobs served back-to-back by one worker task.
+
+    async with AsyncAcceleratorSession(dma, load_keys) as session:
+        C_array, hw_exec_time = await session.encrypt(key_e, key_n, M_array)
+
+    Callers convert their messages into DMA buffers concurrently, before the
+    job is queued. The DMA runs one job at a time: the worker starts the next
+    queued job as soon as the previous transfer completes and converts the
+    previous job's output while the next transfer is in flight. load_keys(exponent,
+    modulus) writes the key registers and is only called between transfers,
+    when the key changes, so a key switch cannot overlap a transfer.
+    Completion uses the channel's wait_async() (interrupt driven on PYNQ 2.5+);
+    older channels fall back to wait() in a thread.
+
+    Once a job is queued the worker owns its buffers and returns them to the
+    pool, also when the caller is cancelled: a cancelled job that has not
+    started is dropped, one in flight is waited for before its buffers are freed.
+    """
+
+    def __init__(self, dma, load_keys=None, allocate=cma_allocate, min_words=MIN_POOL_WORDS):
+        self.session = AcceleratorSession(dma, allocate, min_words)
+        self.load_keys = load_keys
+        self.loaded_key = None
+        self.overlapped = 0   # outputs converted while the next transfer was in flight
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    async def _wait(self):
+        channel = self.session.dma.recvchannel
+        if hasattr(channel, "wait_async"):
+            await channel.wait_async()
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, channel.wait)
+
+    def _finish(self, job, future):
+        """Convert a completed job's output for its caller and free its buffers."""
+        try:
+            if not future.cancelled():
+                future.set_result((word2msg(job.output), job.exec_time))
+        finally:
+            self.session.release(job)
+
+    async def _run_jobs(self):
+        done = None               # completed job whose output is not converted yet
+        while True:
+            if done is not None and self._queue.empty():
+                self._finish(*done)
+                done = None
+            key, job, future = await self._queue.get()
+            if job is None:
+                break
+            if future.cancelled():
+                self.session.release(job)
+                continue
+            try:
+                if self.load_keys is not None and key != self.loaded_key:
+                    self.load_keys(*key)
+                    self.loaded_key = key
+                self.session.start(job)
+                if done is not None:
+                    self._finish(*done)   # overlaps with the transfer just started
+                    done = None
+                    self.overlapped += 1
+                await self._wait()
+                job.exec_time = time.time() - job._start_time
+                done = (job, future)
+            except Exception as exc:
+                if not future.cancelled():
+                    future.set_exception(exc)
+                self.session.release(job)
+        if done is not None:
+            self._finish(*done)
+
+    async def crypt(self, exponent, modulus, M_array):
+        """C = M**exponent mod modulus for every block: (C_array, hw_exec_time)."""
+        if self._worker is None:
+            self._worker = asyncio.ensure_future(self._run_jobs())
+        M_array = M_array if hasattr(M_array, "__len__") else list(M_array)
+        job = self.session.job(len(M_array))
+        try:
+            msg2word(M_array, out=job.input)
+            future = asyncio.get_running_loop().create_future()
+            self._queue.put_nowait(((exponent, modulus), job, future))
+        except BaseException:
+            self.session.release(job)   # never reached the queue
+            raise
+        return await future
+
+    async def encrypt(self, key_e, key_n, M_array):
+        return await self.crypt(key_e, key_n, M_array)
+
+    async def decrypt(self, key_d, key_n, C_array):
+        return await self.crypt(key_d, key_n, C_array)
+
+    async def close(self):
+        """Finish the queued jobs, stop the worker and free the buffers."""
+        if self._worker is not None:
+            await self._queue.put((None, None, None))
+            await self._worker
+            self._worker = None
+        self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+# -----------------------------
+# Simple test against the mock DMA
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    import numpy as np
+
+    from pynq_mock import MockDMA, MockMMIO, mock_allocate
+
+    LATENCY = 0.02
+    JOBS = 10
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+    mmio = MockMMIO()
+    dma = MockDMA(mmio, latency=LATENCY)
+
+    def load_keys(exponent, modulus):
+        mmio.array[:8] = msg2word([modulus])  # the XOR test design only uses key_n
+
+    async def ticker(stop):
+        ticks = 0
+        while not stop.is_set():
+            await asyncio.sleep(0)
+            ticks += 1
+        return ticks
+
+    def free_buffers(session):
+        return [b for free in session.session.pool._free.values() for b in free]
+
+    async def main():
+        stop = asyncio.Event()
+        ticks = asyncio.ensure_future(ticker(stop))
+        async with AsyncAcceleratorSession(dma, load_keys, allocate=mock_allocate) as session:
+            batches = [[random.getrandbits(255) for _ in range(random.randint(1, 100))]
+                       for _ in range(JOBS)]
+            results = await asyncio.gather(*(
+                session.encrypt(key_e, key_n, M) if i % 2 == 0 else session.decrypt(key_d, key_n, M)
+                for i, M in enumerate(batches)))
+            for M, (C, _) in zip(batches, results):
+                assert C == [m ^ key_n for m in M], "XOR loopback failed!"
+            # All jobs were queued together: every output but the last was converted
+            # while the following transfer was in flight
+            assert session.overlapped == JOBS - 1, "Jobs were not issued back-to-back"
+            stop.set()
+            # The loop kept running while the jobs were in flight
+            assert await ticks >= JOBS, "The event loop was blocked while waiting for the DMA"
+
+            # Cancel one job in flight and one still queued: no buffer may return
+            # to the pool before the worker is done with it
+            running = asyncio.ensure_future(session.encrypt(key_e, key_n, batches[0]))
+            queued = asyncio.ensure_future(session.encrypt(key_e, key_n, batches[1]))
+            await asyncio.sleep(0)          # both queued
+            await asyncio.sleep(0)          # worker started the first transfer
+            in_flight = dma.sendchannel.buffer
+            assert in_flight is not None, "First job not started"
+            running.cancel()
+            queued.cancel()
+            await asyncio.sleep(0)
+            assert dma.sendchannel.buffer is in_flight, "Transfer no longer in flight"
+            assert not any(np.shares_memory(in_flight, b) for b in free_buffers(session)), \
+                "Buffers of a running transfer went back to the pool"
+            C, _ = await session.encrypt(key_e, key_n, batches[2])
+            assert C == [m ^ key_n for m in batches[2]]
+            assert running.cancelled() and queued.cancelled()
+            # Every buffer is back in the pool once the worker is idle
+            assert len(free_buffers(session)) == session.session.pool.allocations
+        print(f"{JOBS} queued jobs, {JOBS - 1} outputs converted during the next transfer, cancellation handled")
+
+    asyncio.run(main())
+    print("Async accelerator session test passed!")
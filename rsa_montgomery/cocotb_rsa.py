@@ -0,0 +1,122 @@
+# COCOTB TESTS
+# rsa_core / monpro driven from the Python reference models; launched per shard by regression.py
+import json
+import os
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, RisingEdge
+
+from hex_vectors import HexVectorFile
+from key_registry import get_key_context
+from regression import ENV_EXPECTED, ENV_INPUT, ENV_RESULT, ENV_TIMEOUT
+
+CLK_PERIOD_NS = 10
+
+
+def _read_lines(path):
+    with open(path) as f:
+        return [int(line, 16) for line in f if line.strip()]
+
+
+def _write_result(result):
+    with open(os.environ[ENV_RESULT], "w") as f:
+        json.dump(result, f)
+
+
+async def _reset(dut, cycles=5):
+    cocotb.start_soon(Clock(dut.clk, CLK_PERIOD_NS, unit="ns").start())
+    dut.reset_n.value = 0
+    await ClockCycles(dut.clk, cycles)
+    dut.reset_n.value = 1
+    await RisingEdge(dut.clk)
+
+
+@cocotb.test()
+async def test_rsa_core(dut):
+    """Stream one shard through rsa_core, compare every block and count cycles from input to output."""
+    with HexVectorFile(os.environ[ENV_INPUT], sidecar=False) as vectors:
+        header = vectors.header
+        blocks = list(vectors)
+        exponent, schedule = vectors.key_schedule()
+    expected = _read_lines(os.environ[ENV_EXPECTED])
+    key = get_key_context(exponent, header['KEY N'])
+    timeout = int(os.environ.get(ENV_TIMEOUT, 200000))
+    assert key.schedule == schedule, "Schedule registers in the vector header do not match the key's VLNW plan"
+
+    dut.key_n.value = header['KEY N']
+    dut.key_e_d.value = exponent
+    dut.r2_mod_n.value = header['R2_MOD_N']
+    dut.n_prime.value = header['N_PRIME']
+    for k, reg in enumerate(schedule):
+        getattr(dut, f"vlnw_schedule_{k}").value = reg
+    dut.msgin_valid.value = 0
+    dut.msgin_last.value = 0
+    dut.msgout_ready.value = 1
+    await _reset(dut)
+
+    def drive(index):
+        dut.msgin_valid.value = int(index < len(blocks))
+        if index < len(blocks):
+            dut.msgin_data.value = blocks[index]
+            dut.msgin_last.value = int(index == len(blocks) - 1)
+
+    # Handshakes are sampled at the rising edge; a block is lost if nothing moves for timeout cycles
+    cycle = idle = next_in = 0
+    sent_at, results, cycles = [], [], []
+    drive(next_in)
+    while len(results) < len(blocks) and idle < timeout:
+        await RisingEdge(dut.clk)
+        cycle += 1
+        idle += 1
+        if dut.msgin_valid.value == 1 and dut.msgin_ready.value == 1:
+            sent_at.append(cycle)
+            next_in += 1
+            idle = 0
+        if dut.msgout_valid.value == 1:
+            results.append(int(dut.msgout_data.value))
+            cycles.append(cycle - sent_at[len(results) - 1])
+            idle = 0
+        drive(next_in)
+
+    mismatches = [i for i, (got, exp) in enumerate(zip(results, expected)) if got != exp]
+    missing = len(blocks) - len(results)
+    _write_result({
+        'blocks': len(blocks),
+        'received': len(results),
+        'mismatches': mismatches,
+        'cycles': cycles,
+    })
+    assert not missing, f"{missing} blocks never came out (timeout {timeout} cycles)"
+    assert not mismatches, f"{len(mismatches)} mismatching blocks, first at {mismatches[0]}"
+
+
+@cocotb.test()
+async def test_monpro(dut):
+    """monpro_tb stimulus file (A B N N_PRIME per line) against the expected R, cycles per MonPro."""
+    with open(os.environ[ENV_INPUT]) as f:
+        stim = [[int(v, 16) for v in line.split()] for line in f if line.strip()]
+    expected = _read_lines(os.environ[ENV_EXPECTED])
+    timeout = int(os.environ.get(ENV_TIMEOUT, 1000))
+
+    dut.start.value = 0
+    await _reset(dut)
+    mismatches, cycles = [], []
+    for i, (a, b, n, n_prime) in enumerate(stim):
+        dut.A.value, dut.B.value, dut.n.value, dut.n_prime.value = a, b, n, n_prime
+        dut.start.value = 1
+        await RisingEdge(dut.clk)
+        dut.start.value = 0
+        for count in range(1, timeout + 1):
+            await RisingEdge(dut.clk)
+            if dut.done.value == 1:
+                break
+        else:
+            mismatches.append(i)
+            break
+        cycles.append(count)
+        if int(dut.r.value) != expected[i]:
+            mismatches.append(i)
+
+    _write_result({'blocks': len(stim), 'received': len(cycles), 'mismatches': mismatches, 'cycles': cycles})
+    assert not mismatches, f"{len(mismatches)} mismatching MonPros, first at {mismatches[0]}"
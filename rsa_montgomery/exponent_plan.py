@@ -0,0 +1,155 @@
+# EXPONENT PLANS
+# VLNW window schedule compiled once per (exponent, window size) and shared by all exponentiations
+import hashlib
+from array import array
+from collections import OrderedDict
+
+# Number of compiled plans kept in the cache
+PLAN_CACHE_SIZE = 32
+
+# No multiply after the squarings of this op
+NO_MULTIPLY = -1
+
+
+def key_fingerprint(exponent):
+    """Short stable fingerprint of a key, used to index plan caches."""
+    data = exponent.to_bytes(max(1, (exponent.bit_length() + 7) // 8), "big")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class ExponentPlan:
+    """
+    Compiled VLNW schedule, MSB first (execution order).
+
+    Op i squares the accumulator squares[i] times and then, if
+    table_index[i] != NO_MULTIPLY, multiplies by the odd power
+    M^(2*table_index[i] + 1). Windows are the same as vlnw_schedule:
+    zero windows of length 1, nonzero windows of up to window_size bits.
+
+    Precompute requirements: the table must hold the odd powers
+    M^1, M^3, ..., M^max_power (table_size entries).
+    """
+
+    def __init__(self, exponent, window_size=4):
+        if exponent <= 0:
+            raise ValueError("Exponent must be positive")
+        if not 1 <= window_size <= 8:
+            raise ValueError("Window size must be between 1 and 8")
+        self.exponent = exponent
+        self.window_size = window_size
+        self.fingerprint = key_fingerprint(exponent)
+
+        # Windows LSB -> MSB, straight from the exponent bits
+        windows = []
+        nbits = exponent.bit_length()
+        i = 0
+        while i < nbits:
+            if (exponent >> i) & 1 == 0:
+                windows.append((0, 1))
+                i += 1
+            else:
+                win_len = min(window_size, nbits - i)
+                windows.append(((exponent >> i) & ((1 << win_len) - 1), win_len))
+                i += win_len
+
+        self.squares = array('B', (win_len for _, win_len in reversed(windows)))
+        self.table_index = array('b', ((win_val >> 1) if win_val else NO_MULTIPLY
+                                       for win_val, _ in reversed(windows)))
+
+        used = [t for t in self.table_index if t != NO_MULTIPLY]
+        self.table_size = max(used) + 1
+        self.max_power = 2 * self.table_size - 1
+        self.num_squares = sum(self.squares)
+        self.num_multiplies = len(used)
+
+    def __len__(self):
+        return len(self.squares)
+
+    def __iter__(self):
+        """Yield (square_count, table_index) ops in execution order."""
+        return zip(self.squares, self.table_index)
+
+    def schedule(self):
+        """The plan as a vlnw_schedule list: (window_value, window_length), LSB first."""
+        return [(2 * t + 1 if t != NO_MULTIPLY else 0, sq)
+                for sq, t in reversed(list(self))]
+
+    def monpro_count(self, from_one=True):
+        """MonPros in the main loop (skip the first window's squarings if not from 1_bar)."""
+        count = self.num_squares + self.num_multiplies
+        if not from_one:
+            count -= self.squares[0] + 1
+        return count
+
+    def __repr__(self):
+        return (f"ExponentPlan(key={self.fingerprint}, d={self.window_size}, ops={len(self)}, "
+                f"squares={self.num_squares}, multiplies={self.num_multiplies}, "
+                f"table_size={self.table_size})")
+
+
+_plan_cache = OrderedDict()
+
+
+def get_plan(exponent, window_size=4):
+    """Return the compiled plan for exponent, cached by (key fingerprint, window size)."""
+    cache_key = (key_fingerprint(exponent), window_size)
+    plan = _plan_cache.get(cache_key)
+    if plan is not None and plan.exponent == exponent:
+        _plan_cache.move_to_end(cache_key)
+        return plan
+    plan = ExponentPlan(exponent, window_size)
+    _plan_cache[cache_key] = plan
+    if len(_plan_cache) > PLAN_CACHE_SIZE:
+        _plan_cache.popitem(last=False)
+    return plan
+
+
+def vlnw_schedule(exponent, d=4):
+    """VLNW windows as (window_value, window_length), LSB first; [] for exponent 0."""
+    if exponent == 0:
+        return []
+    return get_plan(exponent, d).schedule()
+
+
+def precompute_base_powers(base_bar, monpro, plan):
+    """
+    Odd powers {1: M, 3: M^3, ..., plan.max_power: M^max} of base_bar with the
+    two-operand MonPro kernel monpro(a, b): M^2 once, then one MonPro per entry.
+    Only the powers the plan multiplies by are computed.
+    """
+    powers = {1: base_bar}
+    if plan.max_power < 3:
+        return powers
+    M2 = monpro(base_bar, base_bar)
+    for w in range(3, plan.max_power + 1, 2):
+        powers[w] = monpro(powers[w - 2], M2)
+    return powers
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+
+    for exp in [key_d, key_e] + [random.getrandbits(256) | 1 for _ in range(100)]:
+        for d in (1, 2, 4, 6):
+            plan = get_plan(exp, d)
+            E = 0
+            for sq, t in plan:  # L squarings, then multiply
+                E = (E << sq) + (2 * t + 1 if t != NO_MULTIPLY else 0)
+            assert E == exp, "Plan does not reconstruct the exponent!"
+            assert get_plan(exp, d) is plan, "Plan was not cached!"
+
+    # Odd-power table with a plain modular multiply as the kernel
+    plan = get_plan(key_d, 4)
+    powers = precompute_base_powers(7, lambda a, b: a * b % 1009, plan)
+    assert powers == {w: pow(7, w, 1009) for w in range(1, plan.max_power + 1, 2)}
+    assert vlnw_schedule(0) == [] and vlnw_schedule(key_e, 4) == get_plan(key_e, 4).schedule()
+
+    print(get_plan(key_d, 4))
+    print(get_plan(key_e, 4))
+    print("Exponent plan test passed!")
@@ -0,0 +1,266 @@
+# HEX TEST VECTORS
+# Reader for the long_test.inp_messages.hex_* files used by the testbenches
+import glob
+import mmap
+import os
+
+import numpy as np
+
+HEX_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "EXPONENTIATION_FUNGERER")
+TEST_FILE_PATTERN = "long_test.inp_messages.hex_*_in.txt"
+
+BLOCK_HEX = 64              # hex digits per 256-bit block line
+BLOCK_WORDS = 8
+SIDECAR_SUFFIX = ".blocks.npy"
+STAMP_SUFFIX = ".blocks.stamp"     # size and mtime of the hex file the sidecar was decoded from
+
+# ASCII -> nibble, 255 for anything that is not a hex digit
+_NIBBLE = np.full(256, 255, dtype=np.uint8)
+for _digits, _base in ((b"0123456789", 0), (b"abcdef", 10), (b"ABCDEF", 10)):
+    _NIBBLE[np.frombuffer(_digits, dtype=np.uint8)] = np.arange(_base, _base + len(_digits))
+
+
+def test_files(folder=HEX_FOLDER, pattern=TEST_FILE_PATTERN):
+    """Sorted paths of the input vector files (pt0..pt2, ct3..ct5)."""
+    return sorted(glob.glob(os.path.join(folder, pattern)))
+
+
+def read_header(path):
+    """
+    Header constants up to the first blank line, as ints keyed by name:
+    'KEY N', 'KEY E', 'KEY D', 'COMMAND', 'N_PRIME', 'R2_MOD_N',
+    'DECR_SCHED0'..'DECR_SCHED2', 'ENCR_SCHED0'..'ENCR_SCHED2'.
+    """
+    with open(path) as f:
+        return _parse_header(f)
+
+
+def _parse_header(lines):
+    header = {}
+    name = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            break
+        if line.startswith("#"):
+            name = line[1:].strip()
+        elif name is not None:
+            header[name] = int(line, 16)
+            name = None
+    return header
+
+
+def read_blocks(path):
+    """The 256-bit message blocks after the header, one per line."""
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+    return [int(line, 16) for line in lines[lines.index("") + 1:] if line]
+
+
+def key_schedule(header):
+    """(exponent, packed schedule registers) selected by the COMMAND field (1 = encrypt)."""
+    if header['COMMAND'] == 1:
+        return header['KEY E'], tuple(header[f'ENCR_SCHED{i}'] for i in range(3))
+    return header['KEY D'], tuple(header[f'DECR_SCHED{i}'] for i in range(3))
+
+
+class HexVectorFile:
+    """
+    Indexed, memory-mapped view of one vector file.
+
+    The header is parsed once and the body is indexed by line start offsets,
+    so block i is one slice of the mapping (O(1), no rescan). words is the
+    (N, 8) uint32 block array in the msg2word layout (word 0 least
+    significant), decoded on first access with one vectorized pass. With
+    sidecar=True, the decoded array is saved next to the file (path +
+    SIDECAR_SUFFIX, plus a path + STAMP_SUFFIX stamp) and memory-mapped on
+    later loads, as long as the hex file still has the size and mtime in
+    the stamp.
+    """
+
+    def __init__(self, path, sidecar=False):
+        self.path = path
+        self.sidecar = sidecar
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self._stamp = f"{stat.st_size} {stat.st_mtime_ns}"
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self._bytes = np.frombuffer(self._map, dtype=np.uint8)
+        self.header, body = self._read_header()
+        self.offsets = self._index(body)
+        self._words = None
+
+    def _read_header(self):
+        """Header dict and the offset of the first line after the blank separator line."""
+        lines = []
+        pos = 0
+        while pos < len(self._map):
+            end = self._map.find(b"\n", pos)
+            end = len(self._map) if end < 0 else end
+            line = self._map[pos:end].decode("ascii").strip()
+            pos = end + 1
+            if not line:
+                break
+            lines.append(line)
+        return _parse_header(lines), pos
+
+    def _index(self, body):
+        """Start offsets of the non-empty body lines; every block line must be BLOCK_HEX digits."""
+        if body >= len(self._bytes):
+            return np.zeros(0, dtype=np.int64)
+        newlines = np.flatnonzero(self._bytes[body:] == ord("\n")) + body
+        starts = np.concatenate(([body], newlines + 1))
+        ends = np.concatenate((newlines, [len(self._bytes)]))
+        cr = (ends > starts) & (self._bytes[np.maximum(ends - 1, 0)] == ord("\r"))
+        lengths = ends - starts - cr
+        if ((lengths != 0) & (lengths != BLOCK_HEX)).any():
+            raise ValueError(f"{self.path}: block lines must be {BLOCK_HEX} hex digits")
+        return starts[lengths == BLOCK_HEX].astype(np.int64)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        start = int(self.offsets[i])
+        return int(self._map[start:start + BLOCK_HEX], 16)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def decode(self, start=0, stop=None):
+        """(stop - start, 8) uint32 words of a block range, decoded from the hex text."""
+        offsets = self.offsets[start:stop]
+        nibbles = _NIBBLE[self._bytes[offsets[:, None] + np.arange(BLOCK_HEX)]]
+        if (nibbles == 255).any():
+            raise ValueError(f"{self.path}: invalid hex digit in blocks {start}..{stop}")
+        big_endian = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+        return np.ascontiguousarray(big_endian[:, ::-1]).view("<u4").reshape(-1, BLOCK_WORDS)
+
+    @property
+    def sidecar_path(self):
+        return self.path + SIDECAR_SUFFIX
+
+    @property
+    def stamp_path(self):
+        return self.path + STAMP_SUFFIX
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = self._load_sidecar()
+        if self._words is None:
+            self._words = self.decode()
+            if self.sidecar:
+                self._save_sidecar(self._words)
+        return self._words
+
+    def _load_sidecar(self):
+        if not self.sidecar:
+            return None
+        try:
+            with open(self.stamp_path) as f:
+                if f.read().strip() != self._stamp:
+                    return None
+            words = np.load(self.sidecar_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if words.shape != (len(self), BLOCK_WORDS) or words.dtype != np.dtype("<u4"):
+            return None
+        return words
+
+    def _save_sidecar(self, words):
+        tmp = self.sidecar_path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, words)
+            os.replace(tmp, self.sidecar_path)
+            with open(self.stamp_path, "w") as f:
+                f.write(self._stamp)
+        except OSError:
+            pass    # read-only folder: decode again next time
+
+    def key_schedule(self):
+        return key_schedule(self.header)
+
+    def close(self):
+        self._words = None
+        self._bytes = None
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"HexVectorFile({os.path.basename(self.path)}, blocks={len(self)})"
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from montgomery_batch import iter_blocks
+    from msg_convert import msg2word
+
+    for path in test_files():
+        with HexVectorFile(path, sidecar=False) as vectors:
+            blocks = read_blocks(path)
+            assert vectors.header == read_header(path)
+            assert len(vectors) == len(blocks) and vectors[-1] == blocks[-1]
+            assert list(iter_blocks(vectors.words)) == blocks, "Decoded words differ from read_blocks!"
+            assert list(iter_blocks(vectors.decode(5, 9))) == blocks[5:9]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Large file: the pt1 blocks repeated, with CRLF line ends
+        src = read_blocks(test_files()[3])
+        path = os.path.join(tmp, "big_in.txt")
+        with open(path, "w", newline="\r\n") as f:
+            f.write("\n".join(f"# {k}\n{v:x}" for k, v in read_header(test_files()[3]).items()) + "\n\n")
+            f.write("\n".join(f"{m:064x}" for m in src * 1200))
+
+        start = time.time()
+        blocks = read_blocks(path)
+        line_words = msg2word(blocks)
+        t_lines = time.time() - start
+
+        start = time.time()
+        with HexVectorFile(path, sidecar=True) as vectors:
+            words = vectors.words
+            t_index = time.time() - start
+            assert vectors[len(blocks) // 2] == blocks[len(blocks) // 2]
+            assert (words.ravel() == line_words).all()
+        assert os.path.exists(path + SIDECAR_SUFFIX) and os.path.exists(path + STAMP_SUFFIX)
+
+        start = time.time()
+        with HexVectorFile(path, sidecar=True) as vectors:
+            cached = vectors.words
+            t_cached = time.time() - start
+            assert isinstance(cached, np.memmap) and (cached[-3:] == words[-3:]).all()
+
+        # One more block with the old mtime restored: the size alone makes the sidecar stale
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, "a", newline="\r\n") as f:
+            f.write(f"\n{src[0]:064x}")
+        os.utime(path, ns=(mtime, mtime))
+        with HexVectorFile(path, sidecar=True) as vectors:
+            assert len(vectors.words) == len(blocks) + 1 and not isinstance(vectors.words, np.memmap)
+
+        # Sidecars are opt-in, and empty files cannot be memory-mapped
+        other = os.path.join(tmp, "other_in.txt")
+        open(other, "w").close()
+        with HexVectorFile(other) as vectors:
+            assert len(vectors) == 0 and vectors.header == {} and vectors.words.shape == (0, BLOCK_WORDS)
+        assert not os.path.exists(other + SIDECAR_SUFFIX)
+
+        print(f"{len(blocks)} blocks: read_blocks + msg2word {t_lines * 1000:.0f} ms, "
+              f"index + decode {t_index * 1000:.0f} ms, sidecar {t_cached * 1000:.1f} ms")
+    print("Hex vector reader test passed!")
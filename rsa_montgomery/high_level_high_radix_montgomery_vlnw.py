@@ -1,5 +1,7 @@
 # HIGH-RADIX MONTGOMERY WITH VLNW
 import random
+from exponent_plan import NO_MULTIPLY, get_plan, precompute_base_powers
+from montgomery_context import get_context
 
 # -----------------------------
 # PARAMETERS
@@ -48,7 +50,7 @@ def extended_gcd(a, b):
 # -----------------------------
 # High-Radix Montgomery Multiplication
 # -----------------------------
-def monpro_hr(a_bar, b_bar, n, w=WORD_BITS):
+def monpro_hr(a_bar, b_bar, n, w=WORD_BITS, ctx=None):
     """
     High-Radix Montgomery multiplication:
     Computes a_bar * b_bar * R^-1 mod n
@@ -56,12 +58,16 @@ def monpro_hr(a_bar, b_bar, n, w=WORD_BITS):
     global mul_count
     mul_count += 1
 
-    # Precompute n0_inv = -n0^-1 mod 2^w
-    n0 = n & ((1 << w) - 1)
-    n0_inv = (-modinv(n0, 1 << w)) & ((1 << w) - 1)
+    # n0_inv = -n0^-1 mod 2^w, computed once per modulus by the context
+    if ctx is None:
+        ctx = get_context(n, word_bits=w)
+    elif ctx.word_bits != w:
+        raise ValueError(f"Context has {ctx.word_bits}-bit words, expected {w}")
+    n0_inv = ctx.n0_inv
+    s = ctx.r_bits // w  # one pass per word of R, also when a_bar has leading zero words
     A = int_to_words(a_bar, w)
+    A += [0] * (s - len(A))
     B = int_to_words(b_bar, w)
-    s = len(A)
     u = 0
 
     for i in range(s):
@@ -80,71 +86,39 @@ def monpro_hr(a_bar, b_bar, n, w=WORD_BITS):
 # -----------------------------
 # Conversions to/from Montgomery domain
 # -----------------------------
-def to_montgomery(a, n):
-    return (a << R_BITS) % n
+def to_montgomery(a, n, ctx=None):
+    if ctx is None:
+        ctx = get_context(n)
+    return monpro_hr(a % n, ctx.r2_mod_n, n, ctx=ctx)  # MonPro(a, R^2 mod n), no 512-bit %
 
-def from_montgomery(a_bar, n):
-    return monpro_hr(a_bar, 1, n)  # multiply by 1 in HR-MonPro
-
-# -----------------------------
-# VLNW schedule generator
-# -----------------------------
-def vlnw_schedule(exponent: int, d):
-    d = 4
-    e_bits = bin(exponent)[2:][::-1]  # LSB first
-    schedule = []
-    i = 0
-    while i < len(e_bits):
-        if e_bits[i] == '0':
-            schedule.append((0, 1))
-            i += 1
-        else:
-            win_len = min(d, len(e_bits) - i)
-            val = 0
-            for j in range(win_len):
-                val |= (int(e_bits[i + j]) << j)
-            schedule.append((val, win_len))
-            i += win_len
-    print(schedule)
-    print(len(schedule))
-
-    return schedule
-
-# -----------------------------
-# Precompute odd powers of base
-# -----------------------------
-def precompute_base_powers(base_bar, modulus, d):
-    max_w = (1 << d) - 1
-    powers = {1: base_bar}
-    M2 = monpro_hr(base_bar, base_bar, modulus)
-    for w in range(3, max_w + 1, 2):
-        powers[w] = monpro_hr(powers[w - 2], M2, modulus)
-    return powers
+def from_montgomery(a_bar, n, ctx=None):
+    return monpro_hr(a_bar, 1, n, ctx=ctx)  # multiply by 1 in HR-MonPro
 
 # -----------------------------
 # VLNW Montgomery exponentiation (High-Radix)
 # -----------------------------
-def montgomery_pow_vlnw_hr(msgin_data, exponent, modulus, d):
+def montgomery_pow_vlnw_hr(msgin_data, exponent, modulus, d, ctx=None):
     if modulus == 1:
         return 0
     if exponent == 0:
         return 1 % modulus
+    if ctx is None:
+        ctx = get_context(modulus)
 
-    one_bar  = to_montgomery(1, modulus)
-    msgin_data_bar = to_montgomery(msgin_data, modulus)
+    one_bar  = to_montgomery(1, modulus, ctx)
+    msgin_data_bar = to_montgomery(msgin_data, modulus, ctx)
 
-    powers = precompute_base_powers(msgin_data_bar, modulus, d)
-    schedule = vlnw_schedule(exponent, d)
+    plan = get_plan(exponent, d)  # compiled once, reused for every message
+    powers = precompute_base_powers(msgin_data_bar, lambda a, b: monpro_hr(a, b, modulus, ctx=ctx), plan)
 
     acc = one_bar
-    for win_val, win_len in reversed(schedule):
-        print(win_len)
+    for win_len, t in plan:
         for _ in range(win_len):
-            acc = monpro_hr(acc, acc, modulus)  # square
-        if win_val != 0:
-            acc = monpro_hr(acc, powers[win_val], modulus)  # multiply
+            acc = monpro_hr(acc, acc, modulus, ctx=ctx)  # square
+        if t != NO_MULTIPLY:
+            acc = monpro_hr(acc, powers[2 * t + 1], modulus, ctx=ctx)  # multiply
 
-    return from_montgomery(acc, modulus)
+    return from_montgomery(acc, modulus, ctx)
 
 # -----------------------------
 # -----------------------------
@@ -178,25 +152,24 @@ def montgomery_pow_vlnw_hr(msgin_data, exponent, modulus, d):
 #     assert M_dec == M, "High-radix VLNW failed!"
 #     print("High-radix VLNW test passed!")
 
-def precompute_R2_modn__and_n0_prime(key_n):
-  R = 1 << 256
-  w = 32
-  n0 = key_n & ((1 << w) - 1)
-  n0_inv = (-modinv(n0, 1 << w)) & ((1 << w) - 1)
-  return R**2 % key_n, n0_inv
+def precompute_R2_modn__and_n0_prime(key_n, ctx=None):
+  if ctx is None:
+    ctx = get_context(key_n)
+  return ctx.r2_mod_n, ctx.n0_inv
 
-# constants:
-n_prime = 2285093819
-n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+if __name__ == "__main__":
+    # constants:
+    n_prime = 2285093819
+    n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
 
-A = 0x89ABCDEF0123456789ABCDEF0123456789ABCDEF0123456789ABCDEF01234567
-B = 0xFEDCBA9876543210FEDCBA9876543210FEDCBA9876543210FEDCBA9876543210
+    A = 0x89ABCDEF0123456789ABCDEF0123456789ABCDEF0123456789ABCDEF01234567
+    B = 0xFEDCBA9876543210FEDCBA9876543210FEDCBA9876543210FEDCBA9876543210
 
-abar = to_montgomery(int(A), int(n))
-bbar = to_montgomery(int(B), int(n))
-pbar = monpro_hr(abar, bbar, int(n))
-p_fin = from_montgomery(pbar, int(n))
+    abar = to_montgomery(int(A), int(n))
+    bbar = to_montgomery(int(B), int(n))
+    pbar = monpro_hr(abar, bbar, int(n))
+    p_fin = from_montgomery(pbar, int(n))
 
-check = int(A) * int(B) % int(n)
-print(p_fin)
-print(check)
\ No newline at end of file
+    check = int(A) * int(B) % int(n)
+    print(p_fin)
+    print(check)
\ No newline at end of file
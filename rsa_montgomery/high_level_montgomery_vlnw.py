@@ -1,93 +1,47 @@
 #BINARY MONTGOMERY
 import random
 
+from exponent_plan import NO_MULTIPLY, get_plan, precompute_base_powers
+from montgomery_context import from_montgomery, montgomery_redc, to_montgomery
+
 R_BITS = 256
 R = 1 << R_BITS
 
 # Global multiplication counter
 mul_count = 0
 
-# montgomery redcution, part of monpro
-def montgomery_redc(T, n):
-    for _ in range(R_BITS):
-        if T & 1:
-            T = (T + n) >> 1
-        else:
-            T >>= 1
-    if T >= n:
-        T -= n
-    return T
-
 # MonPro(a, b) = a * b * R^{-1} mod n
-def monpro(a_bar, b_bar, n):
+# hardware_faithful: bit-serial REDC instead of the word-level one
+def monpro(a_bar, b_bar, n, hardware_faithful=False):
     global mul_count
     mul_count += 1
     T = a_bar * b_bar
-    return montgomery_redc(T, n)
-
-# Conversions to/from Montgomery domain
-def to_montgomery(a, n):
-    return (a << R_BITS) % n
-
-def from_montgomery(a_bar, n):
-    return montgomery_redc(a_bar, n)
-
-# -----------------------------
-# VLNW schedule generator
-# -----------------------------
-def vlnw_schedule(exponent: int, d: int = 4):
-    e_bits = bin(exponent)[2:][::-1]  # LSB first
-    schedule = []
-    i = 0
-    while i < len(e_bits):
-        if e_bits[i] == '0':
-            schedule.append((0, 1))
-            i += 1
-        else:
-            win_len = min(d, len(e_bits) - i)
-            val = 0
-            for j in range(win_len):
-                val |= (int(e_bits[i + j]) << j)
-            schedule.append((val, win_len))
-            i += win_len
-    return schedule
-
-# -----------------------------
-# Precompute odd powers of base
-# -----------------------------
-def precompute_base_powers(base_bar, modulus, d=4):
-    max_w = (1 << d) - 1
-    powers = {1: base_bar}
-    M2 = monpro(base_bar, base_bar, modulus)
-    for w in range(3, max_w + 1, 2):
-        powers[w] = powers[w - 2]
-        powers[w] = monpro(powers[w], M2, modulus)
-    return powers
+    return montgomery_redc(T, n, hardware_faithful)
 
 # -----------------------------
 # VLNW Montgomery exponentiation
 # -----------------------------
-def montgomery_pow_vlnw(base, exponent, modulus, d=4):
+def montgomery_pow_vlnw(base, exponent, modulus, d=4, hardware_faithful=False):
     if modulus == 1:
         return 0
     base %= modulus
     if exponent == 0:
         return 1 % modulus
 
-    one_bar  = to_montgomery(1, modulus)
-    base_bar = to_montgomery(base, modulus)
+    one_bar  = to_montgomery(1, modulus, hardware_faithful)
+    base_bar = to_montgomery(base, modulus, hardware_faithful)
 
-    powers = precompute_base_powers(base_bar, modulus, d)
-    schedule = vlnw_schedule(exponent, d)
+    plan = get_plan(exponent, d)  # compiled once, reused for every message
+    powers = precompute_base_powers(base_bar, lambda a, b: monpro(a, b, modulus, hardware_faithful), plan)
 
     acc = one_bar
-    for win_val, win_len in reversed(schedule):
+    for win_len, t in plan:
         for _ in range(win_len):
-            acc = monpro(acc, acc, modulus)
-        if win_val != 0:
-            acc = monpro(acc, powers[win_val], modulus)
+            acc = monpro(acc, acc, modulus, hardware_faithful)
+        if t != NO_MULTIPLY:
+            acc = monpro(acc, powers[2 * t + 1], modulus, hardware_faithful)
 
-    return from_montgomery(acc, modulus)
+    return from_montgomery(acc, modulus, hardware_faithful)
 
 
 # -----------------------------
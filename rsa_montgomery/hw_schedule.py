@@ -0,0 +1,183 @@
+# HARDWARE VLNW SCHEDULE
+# Exponent -> packed vlnw_schedule_0..2 register values read by exponentiation.vhd
+from exponent_plan import get_plan
+from montgomery_context import R_BITS
+
+# Default layout of exponentiation.vhd: three 256-bit registers,
+# reg0[255:249] = entry count, then 6-bit entries [u3..u0][L-1] MSB first, reg0[2:0] unused
+SCHEDULE_REGS = 3
+COUNT_BITS = 7
+VALUE_BITS = 4
+LENGTH_BITS = 2
+REG0_PAD_BITS = 3
+
+
+class ScheduleFormat:
+    """
+    Bit layout of the packed schedule registers.
+
+    The first register starts with the count_bits entry count; the entries
+    follow MSB first as [u (value_bits)][L-1 (length_bits)] and run on into
+    the next registers. reg0_pad_bits unused bits end the first register.
+    """
+
+    def __init__(self, registers=SCHEDULE_REGS, reg_bits=R_BITS, count_bits=COUNT_BITS,
+                 value_bits=VALUE_BITS, length_bits=LENGTH_BITS, reg0_pad_bits=REG0_PAD_BITS):
+        self.registers = registers
+        self.reg_bits = reg_bits
+        self.count_bits = count_bits
+        self.value_bits = value_bits
+        self.length_bits = length_bits
+        self.reg0_pad_bits = reg0_pad_bits
+        self.entry_bits = value_bits + length_bits
+        self.capacity = registers * reg_bits - count_bits - reg0_pad_bits  # payload bits
+        self.max_entries = min(self.capacity // self.entry_bits, (1 << count_bits) - 1)
+
+    @classmethod
+    def for_window(cls, window_size, registers=SCHEDULE_REGS, **kwargs):
+        """Entry fields wide enough for window_size (u < 2^w, L - 1 < w)."""
+        return cls(registers, value_bits=window_size,
+                   length_bits=max(1, (window_size - 1).bit_length()), **kwargs)
+
+    def __repr__(self):
+        return (f"ScheduleFormat(registers={self.registers}, entry_bits={self.entry_bits}, "
+                f"max_entries={self.max_entries})")
+
+
+HW_FORMAT = ScheduleFormat()
+
+
+def schedule_entries(exponent, window_size=4):
+    """
+    MSB-first (u, L) entries: L squarings, then multiply by A^u (u = 0: none).
+    Packed from the get_plan windows like schedule_lsb_sliding_packed in
+    eirin/actual_schedule.py: nonzero windows trimmed so they end on a 1,
+    the zero bits above them and the plan's zero windows merged into runs
+    split into chunks of up to window_size.
+    """
+    if exponent <= 0:
+        return []
+    entries = []
+    run = 0
+    for value, length in get_plan(exponent, window_size).schedule():  # LSB first
+        if value == 0:
+            run += length
+            continue
+        entries.extend((0, min(window_size, run - k)) for k in range(0, run, window_size))
+        entries.append((value, value.bit_length()))
+        run = length - value.bit_length()
+    entries.reverse()
+    return entries
+
+
+def verify_msb(entries):
+    """Exponent of MSB-first entries (L squarings, then multiply)."""
+    E = 0
+    for u, L in entries:
+        E = (E << L) + u
+    return E
+
+
+def verify_lsb_entries(entries):
+    """Exponent of LSB-first entries, right to left: multiply by A^u, then square A L times."""
+    E = 0
+    shift = 0
+    for u, L in entries:
+        E += u << shift
+        shift += L
+    return E
+
+
+def pack_schedule(entries, fmt=HW_FORMAT):
+    """Pack MSB-first entries like pack_three_regs; returns the registers as ints."""
+    if len(entries) > fmt.max_entries:
+        raise ValueError(f"{len(entries)} entries do not fit in {fmt}")
+    value_mask = (1 << fmt.value_bits) - 1
+    length_mask = (1 << fmt.length_bits) - 1
+
+    payload = 0
+    for u, L in entries:
+        if u > value_mask or not 1 <= L <= length_mask + 1:
+            raise ValueError(f"Entry (u={u}, L={L}) does not fit in {fmt}")
+        payload = (payload << fmt.entry_bits) | (u << fmt.length_bits) | (L - 1)
+    payload <<= fmt.capacity - len(entries) * fmt.entry_bits  # MSB aligned
+
+    # reg0 = count | first payload bits | pad, the rest fills the following registers
+    rest_bits = (fmt.registers - 1) * fmt.reg_bits
+    reg_mask = (1 << fmt.reg_bits) - 1
+    regs = [(((len(entries) << fmt.capacity) | payload) >> rest_bits) << fmt.reg0_pad_bits]
+    for k in range(fmt.registers - 2, -1, -1):
+        regs.append((payload >> (k * fmt.reg_bits)) & reg_mask)
+    return tuple(regs)
+
+
+def unpack_schedule(regs, fmt=HW_FORMAT):
+    """Inverse of pack_schedule: registers -> MSB-first (u, L) entries."""
+    if len(regs) != fmt.registers:
+        raise ValueError(f"Expected {fmt.registers} schedule registers")
+    rest_bits = (fmt.registers - 1) * fmt.reg_bits
+    stream = regs[0] >> fmt.reg0_pad_bits
+    for reg in regs[1:]:
+        stream = (stream << fmt.reg_bits) | reg
+    count = stream >> fmt.capacity
+    if count > fmt.max_entries:
+        raise ValueError(f"Entry count {count} exceeds {fmt}")
+
+    payload = stream >> (fmt.capacity - count * fmt.entry_bits)
+    value_mask = (1 << fmt.value_bits) - 1
+    length_mask = (1 << fmt.length_bits) - 1
+    entries = []
+    for k in range(count - 1, -1, -1):
+        code = payload >> (k * fmt.entry_bits)
+        entries.append(((code >> fmt.length_bits) & value_mask, (code & length_mask) + 1))
+    return entries
+
+
+def encode_exponent(exponent, window_size=4, fmt=None):
+    """Packed schedule registers for exponent; fmt defaults to the hardware layout for w <= 4."""
+    if fmt is None:
+        fmt = HW_FORMAT if window_size <= 4 else ScheduleFormat.for_window(window_size)
+    return pack_schedule(schedule_entries(exponent, window_size), fmt)
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+
+    # DECR_SCHED0..2 / ENCR_SCHED0..2 of the long_test hex files
+    decr_sched = (0xb6682f00b07782b04f5fb84202b7e189f8427e12c11b781780f00b02f03bfe00,
+                  0xdc2103340be7fc2780580bc2fc00d601ebc1341341341dc37a703705e9c31019,
+                  0xe7016fff02700000000000000000000000000000000000000000000000000000)
+    encr_sched = (0x0c20418618800000000000000000000000000000000000000000000000000000, 0, 0)
+
+    for exp, expected in ((key_d, decr_sched), (key_e, encr_sched)):
+        entries = schedule_entries(exp)
+        E = 0
+        for u, L in entries:  # L squarings, then multiply
+            E = (E << L) + u
+        assert E == exp, "Entries do not reconstruct the exponent!"
+        assert verify_msb(entries) == verify_lsb_entries(entries[::-1]) == exp
+        assert pack_schedule(entries) == expected, "Packed schedule differs from the test vectors!"
+        assert unpack_schedule(expected) == entries, "Decoded schedule differs!"
+
+    # Round trip with wider windows, longer exponents and more registers
+    import random
+    import time
+
+    for w, registers, nbits in ((4, 3, 256), (5, 4, 256), (6, 5, 512), (4, 6, 512)):
+        fmt = ScheduleFormat.for_window(w, registers, count_bits=8)
+        for _ in range(200):
+            exp = random.getrandbits(nbits) | 1
+            entries = schedule_entries(exp, w)
+            if len(entries) > fmt.max_entries:
+                continue
+            assert verify_msb(unpack_schedule(pack_schedule(entries, fmt), fmt)) == exp
+
+    start = time.time()
+    for _ in range(1000):
+        pack_schedule(schedule_entries(key_d))
+    print(f"key_d encoded 1000 times in {(time.time() - start) * 1000:.0f} ms")
+    print("Hardware schedule test passed!")
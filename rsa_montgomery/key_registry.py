@@ -0,0 +1,110 @@
+# KEY REGISTRY
+# Hardware context of a key (packed schedule, R2 mod n, n', 1_bar), computed once per key
+from collections import OrderedDict
+
+from exponent_plan import key_fingerprint
+from hw_schedule import pack_schedule, schedule_entries
+from montgomery_context import get_context
+
+# Number of key contexts kept in the registry
+KEY_CACHE_SIZE = 16
+
+
+def key_hash(exponent, modulus):
+    """Fingerprint of the (exponent, modulus) pair."""
+    return key_fingerprint((modulus << modulus.bit_length()) | exponent)
+
+
+class KeyContext:
+    """
+    Everything the accelerator needs for one (exponent, modulus) pair:
+    the MSB-first schedule entries and their packed registers, R^2 mod n,
+    n' = -n^-1 mod 2^32 and 1_bar = R mod n.
+    """
+
+    def __init__(self, exponent, modulus, window_size=4):
+        ctx = get_context(modulus)
+        self.exponent = exponent
+        self.modulus = modulus
+        self.window_size = window_size
+        self.entries = schedule_entries(exponent, window_size)
+        self.schedule = pack_schedule(self.entries)
+        self.r2_mod_n = ctx.r2_mod_n
+        self.n_prime = ctx.n0_inv
+        self.one_bar = ctx.r_mod_n
+        self.fingerprint = key_hash(exponent, modulus)
+
+    def load(self, regs):
+        """Upload the key to a RegisterFile; returns the number of bus writes."""
+        return regs.write_keys(self.modulus, self.exponent, self.r2_mod_n,
+                               self.schedule, self.n_prime)
+
+    def header(self):
+        """Header constants in the format of the long_test hex files."""
+        return {
+            'N_PRIME': f"{self.n_prime:08X}",
+            'R2_MOD_N': f"{self.r2_mod_n:064X}",
+            'SCHED': [f"{reg:064x}" for reg in self.schedule],
+        }
+
+    def __repr__(self):
+        return (f"KeyContext(key={self.fingerprint}, entries={len(self.entries)}, "
+                f"n_prime=0x{self.n_prime:08X})")
+
+
+_key_cache = OrderedDict()
+
+
+def get_key_context(exponent, modulus, window_size=4):
+    """Return the hardware context for a key, cached by key hash."""
+    cache_key = (key_hash(exponent, modulus), window_size)
+    key = _key_cache.get(cache_key)
+    if key is not None and key.exponent == exponent and key.modulus == modulus:
+        _key_cache.move_to_end(cache_key)
+        return key
+    key = KeyContext(exponent, modulus, window_size)
+    _key_cache[cache_key] = key
+    if len(_key_cache) > KEY_CACHE_SIZE:
+        _key_cache.popitem(last=False)
+    return key
+
+
+def key_loader(regs, window_size=4):
+    """load_keys(exponent, modulus) callback for AsyncAcceleratorSession."""
+    def load_keys(exponent, modulus):
+        get_key_context(exponent, modulus, window_size).load(regs)
+    return load_keys
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import time
+
+    from pynq_mock import MockMMIO
+    from register_file import RegisterFile
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+
+    dec = get_key_context(key_d, key_n)
+    assert dec.header()['N_PRIME'] == "8833C3BB"
+    assert dec.header()['R2_MOD_N'] == "56DDF8B43061AD3DBCD1757244D1A19E2E8C849DDE4817E55BB29D1C20C06364"
+    assert dec.header()['SCHED'][2] == "e7016fff02700000000000000000000000000000000000000000000000000000"
+    assert dec.one_bar == (1 << 256) % key_n
+    assert get_key_context(key_d, key_n) is dec, "Key context was not cached!"
+
+    # Alternate keys the way the six long_test files do
+    regs = RegisterFile(MockMMIO())
+    load_keys = key_loader(regs)
+    start = time.time()
+    for _ in range(100):
+        load_keys(key_e, key_n)
+        load_keys(key_d, key_n)
+    elapsed = time.time() - start
+    assert regs.mmio.block(0x20) == key_d
+    print(f"200 key switches in {elapsed * 1000:.1f} ms, {regs.bus_writes} bus writes")
+    print(dec)
+    print("Key registry test passed!")
@@ -0,0 +1,140 @@
+# VECTORIZED HIGH-RADIX MONPRO
+# Word-serial MonPro of monpro.vhd on a (batch, 8) uint32 limb matrix, one message per row
+import numpy as np
+
+from exponent_plan import NO_MULTIPLY, get_plan
+from montgomery_context import R_BITS, WORD_BITS, get_context
+from msg_convert import msg2word, word2msg
+
+LIMBS = R_BITS // WORD_BITS   # 8 x 32-bit words
+MASK = np.uint64((1 << WORD_BITS) - 1)
+SHIFT = np.uint64(WORD_BITS)
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def ints_to_limbs(values):
+    """List of 256-bit ints -> (batch, 8) uint32, word 0 least significant (msg2word layout)."""
+    return msg2word(values).reshape(-1, LIMBS)
+
+def limbs_to_ints(limbs):
+    """(batch, 8) uint32 -> list of ints."""
+    return word2msg(np.asarray(limbs).reshape(-1))
+
+def _mul_add(U, a, B):
+    """
+    U := a * B + U, with a one word per row and B a (rows or 1, 8) limb matrix.
+    Every partial product is accumulated in 64 bits: (2^32-1)^2 + 2*(2^32-1) < 2^64,
+    and the carry is propagated explicitly limb by limb, like the adder chain.
+    """
+    carry = np.zeros(U.shape[0], dtype=np.uint64)
+    for j in range(LIMBS):
+        t = a * B[:, j] + U[:, j] + carry
+        U[:, j] = t & MASK
+        carry = t >> SHIFT
+    for j in range(LIMBS, U.shape[1]):
+        t = U[:, j] + carry
+        U[:, j] = t & MASK
+        carry = t >> SHIFT
+
+def _conditional_subtract(U, N):
+    """Return U - n where U >= n, else U, as (rows, 8) uint32."""
+    borrow = np.zeros(U.shape[0], dtype=np.uint64)
+    D = np.empty_like(U)
+    for j in range(U.shape[1]):
+        nj = N[0, j] if j < LIMBS else np.uint64(0)
+        sub = nj + borrow
+        D[:, j] = (U[:, j] - sub) & MASK
+        borrow = (U[:, j] < sub).astype(np.uint64)
+    keep_u = (borrow != 0)[:, None]  # U < n
+    return np.where(keep_u, U[:, :LIMBS], D[:, :LIMBS]).astype(np.uint32)
+
+
+# -----------------------------
+# Vectorized MonPro
+# -----------------------------
+def monpro_limbs(A, B, n, ctx=None, n_prime=None):
+    """
+    MonPro(A, B) = A * B * R^-1 mod n for every row, R = 2^256.
+
+    Same word-serial schedule as monpro.vhd, for i = 0..7:
+      U := Ai*B + U;  M := u0*n_prime mod 2^32;  U := (M*n + U) >> 32
+    followed by the final U - n subtraction. B may be a single row.
+    n_prime overrides the context's n0_inv, e.g. with a value read from a register.
+    """
+    if n_prime is None:
+        n_prime = (ctx or get_context(n)).n0_inv
+    A = np.asarray(A, dtype=np.uint64).reshape(-1, LIMBS)
+    B = np.asarray(B, dtype=np.uint64).reshape(-1, LIMBS)
+    N = ints_to_limbs([n]).astype(np.uint64)
+    n0_inv = np.uint64(n_prime)
+
+    # U is 288 bits in hardware; one extra limb holds the transient carry of Ai*B + U
+    U = np.zeros((A.shape[0], LIMBS + 2), dtype=np.uint64)
+    for i in range(LIMBS):
+        _mul_add(U, A[:, i], B)           # U := Ai*B + U
+        M = (U[:, 0] * n0_inv) & MASK     # M := u0*n_prime mod 2^32
+        _mul_add(U, M, N)                 # U := M*n + U (low limb becomes 0)
+        U[:, :-1] = U[:, 1:]              # U >>= 32
+        U[:, -1] = 0
+    return _conditional_subtract(U, N)
+
+
+def montgomery_pow_limbs(messages, exponent, modulus, d=4, ctx=None, plan=None):
+    """
+    VLNW exponentiation of every row of a (batch, 8) uint32 message matrix,
+    with the whole batch stepping through the same exponent plan.
+    """
+    if ctx is None:
+        ctx = get_context(modulus)
+    if plan is None:
+        plan = get_plan(exponent, d)
+    X = np.asarray(messages, dtype=np.uint32).reshape(-1, LIMBS)
+
+    base = monpro_limbs(X, ints_to_limbs([ctx.r2_mod_n]), modulus, ctx)  # toMont(M)
+    table = [base]
+    if plan.table_size > 1:
+        M2 = monpro_limbs(base, base, modulus, ctx)
+        for _ in range(plan.table_size - 1):
+            table.append(monpro_limbs(table[-1], M2, modulus, ctx))
+
+    ops = iter(plan)
+    _, first = next(ops)
+    acc = table[first]
+    for win_len, t in ops:
+        for _ in range(win_len):
+            acc = monpro_limbs(acc, acc, modulus, ctx)
+        if t != NO_MULTIPLY:
+            acc = monpro_limbs(acc, table[t], modulus, ctx)
+
+    return monpro_limbs(acc, ints_to_limbs([1]), modulus, ctx)  # fromMont
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import random
+    import time
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+    R_inv = pow(1 << R_BITS, -1, key_n)
+
+    # MonPro against the integer model, including operands at n-1
+    a = [random.randrange(key_n) for _ in range(2000)] + [key_n - 1]
+    b = [random.randrange(key_n) for _ in range(2000)] + [key_n - 1]
+    r = limbs_to_ints(monpro_limbs(ints_to_limbs(a), ints_to_limbs(b), key_n))
+    assert r == [x * y * R_inv % key_n for x, y in zip(a, b)], "Vectorized MonPro mismatch!"
+
+    M = [random.getrandbits(255) for _ in range(1000)]
+    start = time.time()
+    C = montgomery_pow_limbs(ints_to_limbs(M), key_e, key_n)
+    M_dec = montgomery_pow_limbs(C, key_d, key_n)
+    elapsed = time.time() - start
+    assert limbs_to_ints(C) == [pow(m, key_e, key_n) for m in M], "Encryption mismatch!"
+    assert limbs_to_ints(M_dec) == M, "Decryption mismatch!"
+    print(f"{len(M)} blocks encrypted and decrypted in {elapsed:.2f} s")
+    print("Vectorized MonPro test passed!")
@@ -0,0 +1,214 @@
+# PIPELINED MONPRO SIMULATOR
+# Cycle model of the 5-stage word-serial MonPro with K independent exponentiations interleaved
+from hw_schedule import schedule_entries
+from montgomery_context import WORD_BITS, get_context
+
+# monpro_step of monpro.vhd, issued in this order for every word of A
+AIB, U0NP, MN = "AiB", "u0np", "mn"
+STEPS = (AIB, U0NP, MN)
+
+WORDS = 8
+STAGES = 5          # fetch, 32x256 multiply, add low 144, add high 145, write
+OUTPUT_STAGES = 2   # split 256-bit U - n
+TABLE_SIZE = 8      # A^1, A^3, ..., A^15
+
+WORD_MASK = (1 << WORD_BITS) - 1
+LO_BITS = 144
+LO_MASK = (1 << LO_BITS) - 1
+U_MASK = (1 << 288) - 1
+
+
+def exponentiation_ops(message, exponent, modulus, window_size=4):
+    """
+    Generator of the MonPro operand pairs of one exponentiation.vhd run;
+    send() each MonPro result back in. Returns M^exponent mod n.
+    """
+    ctx = get_context(modulus)
+    acc = yield message, ctx.r2_mod_n            # toMont(A)
+    one_m = yield 1, ctx.r2_mod_n                # toMont(1)
+    table = [acc]
+    a2 = yield acc, acc                          # A^2
+    for _ in range(TABLE_SIZE - 1):              # A^3, A^5..A^15
+        table.append((yield table[-1], a2))
+    acc = one_m
+    for u, L in schedule_entries(exponent, window_size):
+        for _ in range(L):
+            acc = yield acc, acc
+        if u:
+            acc = yield acc, table[u >> 1]
+    return (yield acc, 1)                        # fromMont
+
+
+def step_values(step, A, B, U, M, word, n, n_prime):
+    """
+    One pass through the pipeline, stage by stage as in monpro.vhd:
+    S1 operand select, S2 P = op1 * op2, S3 sum_LO = P[143:0] + U[143:0],
+    S4 MAC = P[287:144] + U[287:144] + carry : sum_LO[143:0], S5 write U or M.
+    """
+    if step == AIB:
+        op1, op2, acc_in = (A >> (WORD_BITS * word)) & WORD_MASK, B, U
+    elif step == U0NP:
+        op1, op2, acc_in = U & WORD_MASK, n_prime, 0
+    else:
+        op1, op2, acc_in = M, n, U
+    P = op1 * op2
+    sum_lo = (P & LO_MASK) + (acc_in & LO_MASK)
+    mac = (((P >> LO_BITS) + (acc_in >> LO_BITS) + (sum_lo >> LO_BITS)) << LO_BITS) | (sum_lo & LO_MASK)
+    if step == AIB:
+        U, out = mac & U_MASK, mac & U_MASK
+    elif step == U0NP:
+        M, out = mac & WORD_MASK, mac & WORD_MASK
+    else:
+        U, out = mac >> WORD_BITS, mac >> WORD_BITS
+    return U, M, {'A_in': op1, 'B_in': op2, 'C_in': acc_in, 'P': P, 'sum_LO': sum_lo, 'MAC': mac, 'out': out}
+
+
+class _Message:
+    """One exponentiation in flight: its operand generator and current MonPro state."""
+
+    def __init__(self, ident, ops):
+        self.ident = ident
+        self.ops = ops
+        self.result = None
+        self.monpros = 0
+        self.ready = 0
+        self._load(next(ops))
+
+    def _load(self, operands):
+        self.A, self.B = operands
+        self.U = self.M = 0
+        self.word = 0
+        self.step = 0
+
+    def finish_monpro(self, n):
+        """Final U - n, then hand the result to the exponentiation."""
+        r = self.U - n if self.U >= n else self.U
+        self.monpros += 1
+        try:
+            self._load(self.ops.send(r))
+        except StopIteration as stop:
+            self.result = stop.value
+
+
+def simulate_pipeline(jobs, modulus, stages=STAGES, output_stages=OUTPUT_STAGES, trace=False):
+    """
+    Cycle-by-cycle run of K = len(jobs) exponentiations sharing one MonPro pipeline.
+
+    jobs: (message, exponent) pairs. Every cycle the next message (round
+    robin) whose previous step has left stage S5 issues its next step; when
+    none is ready the cycle is a bubble. After the last mn step of a MonPro,
+    the message spends output_stages cycles in the subtractor before its next
+    MonPro can issue. With K >= stages the pipeline runs without bubbles.
+
+    Returns results, cycle/bubble counts and, with trace, one record per
+    issued step with the stage values (A_in, B_in, C_in, P, sum_LO, MAC, out).
+    """
+    ctx = get_context(modulus)
+    n, n_prime = modulus, ctx.n0_inv
+    messages = [_Message(k, exponentiation_ops(m, e, modulus)) for k, (m, e) in enumerate(jobs)]
+    active = list(messages)
+    records = []
+    cycle = issued = bubbles = 0
+    steady_start = steady_issued = None
+    last = -1
+
+    while active:
+        msg = None
+        for k in range(1, len(messages) + 1):
+            cand = messages[(last + k) % len(messages)]
+            if cand.result is None and cand.ready <= cycle:
+                msg = cand
+                break
+        if msg is None:
+            bubbles += 1
+        else:
+            last = msg.ident
+            step = STEPS[msg.step]
+            msg.U, msg.M, values = step_values(step, msg.A, msg.B, msg.U, msg.M, msg.word, n, n_prime)
+            if trace:
+                records.append(dict(cycle=cycle, message=msg.ident, monpro=msg.monpros,
+                                    word=msg.word, step=step, **values))
+            issued += 1
+            msg.ready = cycle + stages
+            msg.step += 1
+            if msg.step == len(STEPS):
+                msg.step = 0
+                msg.word += 1
+                if msg.word == WORDS:
+                    msg.ready += output_stages
+                    msg.finish_monpro(n)
+                    if msg.result is not None:
+                        active.remove(msg)
+                        if steady_start is not None and steady_issued is None:
+                            steady_issued = (issued, cycle)
+        if steady_start is None and cycle >= (len(messages) - 1):
+            steady_start = (issued, cycle)
+        cycle += 1
+
+    end_issued, end_cycle = steady_issued or (issued, cycle)
+    steady = (end_issued - steady_start[0]) / max(1, end_cycle - steady_start[1])
+    return {
+        'results': [msg.result for msg in messages],
+        'cycles': cycle,
+        'issued_steps': issued,
+        'bubbles': bubbles,
+        'monpros': sum(msg.monpros for msg in messages),
+        'steady_state_steps_per_cycle': steady,
+        'steady_state_monpros_per_kcycle': steady / (WORDS * len(STEPS)) * 1000,
+        'trace': records,
+    }
+
+
+def format_record(rec):
+    """One trace record in the layout of monpro_stuff/monpro_7_stage_debug.py."""
+    return (f"# cycle {rec['cycle']} msg {rec['message']} monpro {rec['monpro']} "
+            f"word {rec['word']} {rec['step']}\n"
+            f"A_in = 0x{rec['A_in']:08x}\nB_in = 0x{rec['B_in']:x}\nC_in = 0x{rec['C_in']:x}\n"
+            f"MAC = 0x{rec['MAC']:072x}")
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+
+    # Stage values of the first word against monpro_stuff/monpro_7_stage_debug.py
+    A = 0x5b9e402b76181c9c95ce28ced7dde4c04d1e1f5773e9e67e4c907c8fa7c390cc
+    B = 0x1808a604ed7dedcf26e8e371a4e312a51fae740f749aaac0ac10c9cc3469d8d4
+    np_ = get_context(key_n).n0_inv
+    U, M, v = step_values(AIB, A, B, 0, 0, 0, key_n, np_)
+    assert v['MAC'] == 0x0fc0007bb0f51e925d4a96ba63a5e5700ae1acffdd23e51bac4e76c07ba0a547c3cc08f0
+    U, M, v = step_values(U0NP, A, B, U, M, 0, key_n, np_)
+    assert M == 0xb8a95750
+    U, M, v = step_values(MN, A, B, U, M, 0, key_n, np_)
+    # Second line of "# 3 U = m*n"; the first line and the words after it carry a copied 207/206 digit
+    assert v['MAC'] == 0x7e86c0ff525b3da206c3c5666aea8e726952735cd61cad5fc85116b0b94816ef00000000
+
+    # One message: 4 bubbles per step, 122 cycles per MonPro
+    m = random.randrange(key_n)
+    r = simulate_pipeline([(m, key_e)], key_n)
+    assert r['results'] == [pow(m, key_e, key_n)]
+    assert r['cycles'] <= r['monpros'] * (WORDS * len(STEPS) * STAGES + OUTPUT_STAGES)
+
+    for K in (1, 2, 3, 4, 5, 6):
+        jobs = [(random.randrange(key_n), key_e) for _ in range(K)]
+        r = simulate_pipeline(jobs, key_n, trace=(K == STAGES))
+        if K == STAGES:
+            first = r['trace'][0]
+        assert r['results'] == [pow(m, e, key_n) for m, e in jobs], "Pipelined exponentiation mismatch!"
+        print(f"K={K}: {r['cycles']:6d} cycles, {r['bubbles']:6d} bubbles, "
+              f"steady state {r['steady_state_steps_per_cycle']:.2f} steps/cycle "
+              f"({r['steady_state_monpros_per_kcycle']:.1f} MonPros per 1000 cycles)")
+    print(format_record(first))
+
+    # Decryption with five messages in flight
+    jobs = [(random.randrange(key_n), key_d) for _ in range(5)]
+    r = simulate_pipeline(jobs, key_n)
+    assert r['results'] == [pow(m, key_d, key_n) for m, _ in jobs]
+    print(f"key_d, K=5: {r['cycles']} cycles for 5 blocks ({r['cycles'] / 5:.0f} per block)")
+    print("Pipelined MonPro test passed!")
@@ -0,0 +1,158 @@
+# MONPRO TRACE
+# Reference MonPro recording every word iteration, with monpro_tb stimulus/expected export
+import os
+
+import numpy as np
+
+from monpro_pipeline import AIB, LO_BITS, MN, U0NP, WORDS, step_values
+from montgomery_context import R_BITS, get_context
+
+# One record per (case, word): the three steps of monpro.vhd for A word i.
+# Multi-word fields are little-endian 32-bit words, as in the limb models.
+TRACE_DTYPE = np.dtype([
+    ('case', '<u4'),
+    ('word', 'u1'),
+    ('a_i', '<u4'),             # A word i
+    ('u_ab', '<u4', (10,)),     # U := Ai*B + U (MAC of the AiB step)
+    ('carry_ab', 'u1'),         # carry out of the low 144-bit adder, AiB step
+    ('m', '<u4'),               # M := u0 * n' mod 2^32
+    ('u_mn', '<u4', (10,)),     # M*n + U before the shift (MAC of the mn step)
+    ('carry_mn', 'u1'),         # carry out of the low 144-bit adder, mn step
+    ('u', '<u4', (9,)),         # U := (M*n + U) >> 32
+])
+
+RESULT_DTYPE = np.dtype([
+    ('case', '<u4'),
+    ('r', '<u4', (8,)),
+    ('subtracted', 'u1'),       # final U - n taken
+])
+
+
+def _words(value, count):
+    return np.frombuffer(value.to_bytes(4 * count, "little"), dtype="<u4")
+
+
+def words_to_int(words):
+    return int.from_bytes(np.ascontiguousarray(words, dtype="<u4").tobytes(), "little")
+
+
+def trace_monpro(a, b, n, n_prime, case, trace):
+    """MonPro(a, b) with the WORDS records of this case written into trace; returns (r, subtracted)."""
+    U = M = 0
+    for i in range(WORDS):
+        rec = trace[i]
+        U, M, ab = step_values(AIB, a, b, U, M, i, n, n_prime)
+        U, M, _ = step_values(U0NP, a, b, U, M, i, n, n_prime)
+        U, M, mn = step_values(MN, a, b, U, M, i, n, n_prime)
+        rec['case'] = case
+        rec['word'] = i
+        rec['a_i'] = ab['A_in']
+        rec['u_ab'] = _words(ab['MAC'], 10)
+        rec['carry_ab'] = ab['sum_LO'] >> LO_BITS
+        rec['m'] = M
+        rec['u_mn'] = _words(mn['MAC'], 10)
+        rec['carry_mn'] = mn['sum_LO'] >> LO_BITS
+        rec['u'] = _words(U, 9)
+    if U >= n:
+        return U - n, True
+    return U, False
+
+
+def trace_cases(cases, n):
+    """Trace every (a, b) pair: returns (results, trace) structured arrays."""
+    n_prime = get_context(n).n0_inv
+    trace = np.zeros(len(cases) * WORDS, dtype=TRACE_DTYPE)
+    results = np.zeros(len(cases), dtype=RESULT_DTYPE)
+    for case, (a, b) in enumerate(cases):
+        r, subtracted = trace_monpro(a, b, n, n_prime, case, trace[case * WORDS:(case + 1) * WORDS])
+        results[case] = (case, _words(r, 8), subtracted)
+    return results, trace
+
+
+def random_cases(count, n, seed=None):
+    """count random (a, b) operands below n; the first ones hit n-1 and 0/1 corners."""
+    rng = np.random.default_rng(seed)
+    corners = [(n - 1, n - 1), (n - 1, 1), (1, 1), (0, n - 1)]
+    cases = corners[:count]
+    raw = rng.integers(0, 1 << 32, size=(max(0, count - len(cases)), 2, 8), dtype=np.uint64)
+    for row in raw:
+        a = words_to_int(row[0].astype("<u4")) % n
+        b = words_to_int(row[1].astype("<u4")) % n
+        cases.append((a, b))
+    return cases
+
+
+def write_tb_files(prefix, cases, results, n):
+    """
+    monpro_tb stimulus/expected files, one case per line in hread format:
+      <prefix>_stim.txt:     A B N N_PRIME
+      <prefix>_expected.txt: R
+    """
+    n_prime = get_context(n).n0_inv
+    width = R_BITS // 4
+    with open(prefix + "_stim.txt", "w") as f:
+        for a, b in cases:
+            f.write(f"{a:0{width}X} {b:0{width}X} {n:0{width}X} {n_prime:08X}\n")
+    with open(prefix + "_expected.txt", "w") as f:
+        for rec in results:
+            f.write(f"{words_to_int(rec['r']):0{width}X}\n")
+
+
+def write_trace(path, trace):
+    """Text dump, one line per word iteration: case word a_i u_ab carry m u_mn carry u."""
+    with open(path, "w") as f:
+        for rec in trace:
+            f.write(f"{rec['case']} {rec['word']} {rec['a_i']:08X} "
+                    f"{words_to_int(rec['u_ab']):080X} {rec['carry_ab']} {rec['m']:08X} "
+                    f"{words_to_int(rec['u_mn']):080X} {rec['carry_mn']} {words_to_int(rec['u']):072X}\n")
+
+
+def vhdl_constants(cases, results, start=1):
+    """C_Ak/C_Bk/C_EXPECTED_Rk constants in the style of monpro_tb.vhd."""
+    lines = []
+    for k, ((a, b), rec) in enumerate(zip(cases, results), start):
+        for name, value in ((f"C_A{k}", a), (f"C_B{k}", b), (f"C_EXPECTED_R{k}", words_to_int(rec['r']))):
+            lines.append(f"  constant {name} : std_logic_vector(KW-1 downto 0) :=\n    x\"{value:064x}\";")
+        lines.append("")
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    R_inv = pow(1 << R_BITS, -1, key_n)
+
+    # C_A1/C_B1/C_EXPECTED_R1 of EXPONENTIATION_FUNGERER/monpro_tb.vhd
+    A1 = 0x7b2c2cff3781db07b42ff01e242a6cfe7ef25a57c9491d84cb72a139c3897b63
+    B1 = 0xf89aec4f5d4fab3f990d9124b40120839f8e068c36f94daf6cbd33e0955a2211
+    R1 = 0x2d9b33e33aba4fb7fd9dda7e04f91bb8110aa9a7fe4fa5e5f1a2dcbb3e681a25
+    results, trace = trace_cases([(A1, B1)], key_n)
+    assert words_to_int(results[0]['r']) == R1, "monpro_tb test vector 1 failed!"
+    assert trace[0]['m'] == (words_to_int(trace[0]['u_ab']) * get_context(key_n).n0_inv) & 0xFFFFFFFF
+
+    start = time.time()
+    cases = random_cases(5000, key_n, seed=1)
+    results, trace = trace_cases(cases, key_n)
+    elapsed = time.time() - start
+    for (a, b), rec in zip(cases, results):
+        assert words_to_int(rec['r']) == a * b * R_inv % key_n, "Traced MonPro mismatch!"
+    # Every word leaves U below 2n, so the shifted U fits in 257 bits
+    assert (trace['u'][:, 8] <= 1).all()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "monpro")
+        write_tb_files(prefix, cases, results, key_n)
+        write_trace(prefix + "_trace.txt", trace)
+        np.save(prefix + "_trace.npy", trace)
+        sizes = {name: os.path.getsize(os.path.join(tmp, name)) for name in sorted(os.listdir(tmp))}
+    print(f"{len(cases)} cases traced in {elapsed:.2f} s, "
+          f"{int(results['subtracted'].sum())} with the final subtraction")
+    for name, size in sizes.items():
+        print(f"  {name}: {size / 1024:.0f} KiB")
+    print(vhdl_constants(cases[:1], results[:1]))
+    print("MonPro trace test passed!")
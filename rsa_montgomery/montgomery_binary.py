@@ -1,39 +1,20 @@
 #BINARY MONTGOMERY
 
+from montgomery_context import from_montgomery, montgomery_redc, to_montgomery
+
 R_BITS = 256
 R = 1 << R_BITS
 
 
-# montgomery redcution, part of monpro
-# REDC(T) = T * R^{-1} mod n, for R = 2^R_bits
-def montgomery_redc(T, n):
-    for _ in range(R_BITS):
-        if T & 1:
-            T = (T + n) >> 1
-        else:
-            T >>= 1
-    if T >= n:
-        T -= n
-    return T
-
 # MonPro(a, b) = a * b * R^{-1} mod n
-def monpro(a_bar, b_bar, n):
+# hardware_faithful: bit-serial REDC instead of the word-level one
+def monpro(a_bar, b_bar, n, hardware_faithful=False):
     T = a_bar * b_bar
-    return montgomery_redc(T, n)
-
-
-# Conversions to/from Montgomery domain
-#a_bar = a * R mod n, with R = 2^R_bits
-def to_montgomery(a, n):
-    return (a << R_BITS) % n
-
-#a = a_bar * R^{-1} mod n = REDC(a_bar)
-def from_montgomery(a_bar, n):
-    return montgomery_redc(a_bar, n)
+    return montgomery_redc(T, n, hardware_faithful)
 
 
 # Modular exponentiation using Montgomery multiplication
-def montgomery_pow(base, exponent, modulus):
+def montgomery_pow(base, exponent, modulus, hardware_faithful=False):
     if modulus == 1:
         return 0
     
@@ -42,15 +23,15 @@ def montgomery_pow(base, exponent, modulus):
         return 1 % modulus
 
     # Domain conversion
-    one_bar  = to_montgomery(1,    modulus)
-    base_bar = to_montgomery(base, modulus)
+    one_bar  = to_montgomery(1,    modulus, hardware_faithful)
+    base_bar = to_montgomery(base, modulus, hardware_faithful)
 
     # L→R binary exponentiation
     acc = one_bar # the accumulator is P
     for bit in reversed(range(exponent.bit_length())):
-        acc = monpro(acc, acc, modulus)  # square
+        acc = monpro(acc, acc, modulus, hardware_faithful)  # square
         if (exponent >> bit) & 1:
-            acc = monpro(acc, base_bar, modulus)  # multiply
+            acc = monpro(acc, base_bar, modulus, hardware_faithful)  # multiply
 
     # Convert back
-    return from_montgomery(acc, modulus)
\ No newline at end of file
+    return from_montgomery(acc, modulus, hardware_faithful)
\ No newline at end of file
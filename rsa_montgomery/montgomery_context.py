@@ -0,0 +1,138 @@
+# MONTGOMERY CONTEXT
+# Shared per-modulus constants and a word-level REDC used by all the Montgomery models
+from functools import lru_cache
+
+R_BITS = 256
+WORD_BITS = 32        # high-radix word size
+R = 1 << R_BITS
+R_MASK = R - 1
+
+# Number of moduli kept in the context cache
+CONTEXT_CACHE_SIZE = 32
+
+
+class MontgomeryContext:
+    """
+    Per-modulus Montgomery constants (R = 2^r_bits), computed once.
+
+    n_prime = -n^-1 mod R lets REDC reduce a whole product in one step
+    instead of r_bits iterations of (T + n) >> 1.
+    n0_inv  = -n^-1 mod 2^word_bits is the N_PRIME register of the high-radix hardware.
+    r_mod_n = R mod n is 1 in the Montgomery domain (one_bar).
+    r2_mod_n = R^2 mod n is the R2_MOD_N register used to enter the domain.
+    """
+
+    def __init__(self, n, word_bits=WORD_BITS, r_bits=R_BITS):
+        if n & 1 == 0:
+            raise ValueError("Montgomery modulus must be odd")
+        self.n = n
+        self.word_bits = word_bits
+        self.word_mask = (1 << word_bits) - 1
+        self.r_bits = r_bits
+        self.r_mask = (1 << r_bits) - 1
+        self.n_prime = (-pow(n, -1, 1 << r_bits)) & self.r_mask
+        self.n0_inv = self.n_prime & self.word_mask
+        self.r_mod_n = (1 << r_bits) % n
+        self.r2_mod_n = (self.r_mod_n * self.r_mod_n) % n
+
+    def redc(self, T):
+        """Word-level REDC: returns T * R^-1 mod n for 0 <= T < n*R."""
+        m = ((T & self.r_mask) * self.n_prime) & self.r_mask
+        t = (T + m * self.n) >> self.r_bits
+        if t >= self.n:
+            t -= self.n
+        return t
+
+    def redc_bitserial(self, T):
+        """Hardware-faithful REDC: one conditional add and shift per bit of R."""
+        n = self.n
+        for _ in range(self.r_bits):
+            if T & 1:
+                T = (T + n) >> 1
+            else:
+                T >>= 1
+        if T >= n:
+            T -= n
+        return T
+
+    def monpro(self, a_bar, b_bar, hardware_faithful=False):
+        """MonPro(a, b) = a * b * R^-1 mod n"""
+        T = a_bar * b_bar
+        if hardware_faithful:
+            return self.redc_bitserial(T)
+        return self.redc(T)
+
+    def to_montgomery(self, a, hardware_faithful=False):
+        """a_bar = a * R mod n = MonPro(a mod n, R^2 mod n), for any a >= 0."""
+        return self.monpro(a % self.n, self.r2_mod_n, hardware_faithful)
+
+    def from_montgomery(self, a_bar, hardware_faithful=False):
+        """a = a_bar * R^-1 mod n = MonPro(a_bar, 1)."""
+        return self.monpro(a_bar, 1, hardware_faithful)
+
+
+@lru_cache(maxsize=CONTEXT_CACHE_SIZE)
+def _cached_context(n, word_bits, r_bits):
+    return MontgomeryContext(n, word_bits, r_bits)
+
+
+def get_context(n, word_bits=WORD_BITS, r_bits=R_BITS):
+    """
+    Return the shared MontgomeryContext for modulus n (LRU cached).
+
+    The cache is keyed on all three values with the defaults filled in, so
+    get_context(n), get_context(n, 32) and get_context(n, word_bits=32)
+    return the same context.
+    """
+    return _cached_context(n, word_bits, r_bits)
+
+
+# Module-level REDC and domain conversions for the single-modulus models
+# (montgomery.py, montgomery_binary.py, ...): R = 2^256, context looked up per call.
+# hardware_faithful selects the bit-serial REDC loop of the hardware.
+
+def montgomery_redc(T, n, hardware_faithful=False):
+    """REDC(T) = T * R^-1 mod n, for 0 <= T < n*R."""
+    ctx = get_context(n)
+    if hardware_faithful:
+        return ctx.redc_bitserial(T)
+    return ctx.redc(T)
+
+
+def to_montgomery(a, n, hardware_faithful=False):
+    """a_bar = a * R mod n"""
+    return get_context(n).to_montgomery(a, hardware_faithful)
+
+
+def from_montgomery(a_bar, n, hardware_faithful=False):
+    """a = a_bar * R^-1 mod n"""
+    return get_context(n).from_montgomery(a_bar, hardware_faithful)
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    ctx = get_context(key_n)
+    R_inv = pow(R, -1, key_n)
+
+    for _ in range(1000):
+        a = random.randrange(key_n)
+        b = random.randrange(key_n)
+        expected = a * b * R_inv % key_n
+        assert ctx.monpro(a, b) == expected, "Word-level REDC mismatch!"
+        assert ctx.monpro(a, b, hardware_faithful=True) == expected, "Bit-serial REDC mismatch!"
+        assert ctx.from_montgomery(ctx.to_montgomery(a)) == a, "Domain round trip failed!"
+        a_bar = to_montgomery(a, key_n, hardware_faithful=True)
+        assert a_bar == ctx.to_montgomery(a) and from_montgomery(a_bar, key_n, True) == a
+
+    assert ctx.to_montgomery(key_n + 5) == ctx.to_montgomery(5), "Input not reduced mod n!"
+    assert get_context(key_n, 32) is ctx and get_context(key_n, word_bits=32, r_bits=256) is ctx
+
+    assert ctx.n0_inv == 0x8833c3bb, "N_PRIME does not match the testbench constant!"
+    assert ctx.r2_mod_n == 0x56ddf8b43061ad3dbcd1757244d1a19e2e8c849dde4817e55bb29d1c20c06364
+
+    print("Word-level REDC test passed!")
@@ -1,110 +1,47 @@
 #BINARY MONTGOMERY
 import random
+from exponent_plan import NO_MULTIPLY, get_plan, precompute_base_powers
+from montgomery_context import from_montgomery, montgomery_redc, to_montgomery
+
 R_BITS = 256
 R = 1 << R_BITS
 
 
-# montgomery redcution, part of monpro
-# REDC(T) = T * R^{-1} mod n, for R = 2^R_bits
-def montgomery_redc(T, n):
-    for _ in range(R_BITS):
-        if T & 1:
-            T = (T + n) >> 1
-        else:
-            T >>= 1
-    if T >= n:
-        T -= n
-    return T
-
 # MonPro(a, b) = a * b * R^{-1} mod n
-def monpro(a_bar, b_bar, n):
+# hardware_faithful: bit-serial REDC instead of the word-level one
+def monpro(a_bar, b_bar, n, hardware_faithful=False):
     T = a_bar * b_bar
-    return montgomery_redc(T, n)
-
-
-# Conversions to/from Montgomery domain
-#a_bar = a * R mod n, with R = 2^R_bits
-def to_montgomery(a, n):
-    return (a << R_BITS) % n
-
-#a = a_bar * R^{-1} mod n = REDC(a_bar)
-def from_montgomery(a_bar, n):
-    return montgomery_redc(a_bar, n)
-
-# -----------------------------
-# VLNW schedule generator
-# -----------------------------
-def vlnw_schedule(exponent: int, d: int = 4):
-    """
-    Generate VLNW windows from exponent (LSB -> MSB)
-    Returns a list of (window_value, window_length) from LSB first
-    """
-    e_bits = bin(exponent)[2:][::-1]  # LSB first
-    schedule = []
-    i = 0
-    while i < len(e_bits):
-        if e_bits[i] == '0':
-            # Zero window of length 1
-            schedule.append((0, 1))
-            i += 1
-        else:
-            # Non-zero window of length d or remaining bits
-            win_len = min(d, len(e_bits) - i)
-            val = 0
-            for j in range(win_len):
-                val |= (int(e_bits[i + j]) << j)
-            schedule.append((val, win_len))
-            i += win_len
-    return schedule
-
-# -----------------------------
-# Precompute odd powers of base
-# -----------------------------
-def precompute_base_powers(base_bar, modulus, d=4):
-    """
-    Compute all odd powers M^w for w = 1,3,...,2^d-1
-    using only MonPro and M^2.
-    """
-    max_w = (1 << d) - 1
-    powers = {1: base_bar}
-    M2 = monpro(base_bar, base_bar, modulus)
-
-    # Compute remaining odd powers iteratively
-    for w in range(3, max_w + 1, 2):
-        powers[w] = powers[w - 2]
-        powers[w] = monpro(powers[w], M2, modulus)
-    return powers
-
+    return montgomery_redc(T, n, hardware_faithful)
 
 # -----------------------------
 # VLNW Montgomery exponentiation
 # -----------------------------
-def montgomery_pow_vlnw(base, exponent, modulus, d=4):
+def montgomery_pow_vlnw(base, exponent, modulus, d=4, hardware_faithful=False):
     if modulus == 1:
         return 0
     base %= modulus
     if exponent == 0:
         return 1 % modulus
 
-    one_bar  = to_montgomery(1, modulus)
-    base_bar = to_montgomery(base, modulus)
+    one_bar  = to_montgomery(1, modulus, hardware_faithful)
+    base_bar = to_montgomery(base, modulus, hardware_faithful)
 
     # Precompute odd powers
-    powers = precompute_base_powers(base_bar, modulus, d)
-    schedule = vlnw_schedule(exponent, d)
+    plan = get_plan(exponent, d)  # compiled once, reused for every message
+    powers = precompute_base_powers(base_bar, lambda a, b: monpro(a, b, modulus, hardware_faithful), plan)
 
     acc = one_bar
     # Process windows from MSB → LSB
-    for win_val, win_len in reversed(schedule):
+    for win_len, t in plan:
         for _ in range(win_len):
-            acc = monpro(acc, acc, modulus)  # square
-        if win_val != 0:
-            acc = monpro(acc, powers[win_val], modulus)  # multiply by precomputed
+            acc = monpro(acc, acc, modulus, hardware_faithful)  # square
+        if t != NO_MULTIPLY:
+            acc = monpro(acc, powers[2 * t + 1], modulus, hardware_faithful)  # multiply by precomputed
 
-    return from_montgomery(acc, modulus)
+    return from_montgomery(acc, modulus, hardware_faithful)
 
 # Modular exponentiation using Montgomery multiplication
-def montgomery_pow(base, exponent, modulus):
+def montgomery_pow(base, exponent, modulus, hardware_faithful=False):
     if modulus == 1:
         return 0
     
@@ -113,18 +50,18 @@ def montgomery_pow(base, exponent, modulus):
         return 1 % modulus
 
     # Domain conversion
-    one_bar  = to_montgomery(1,    modulus)
-    base_bar = to_montgomery(base, modulus)
+    one_bar  = to_montgomery(1,    modulus, hardware_faithful)
+    base_bar = to_montgomery(base, modulus, hardware_faithful)
 
     # L→R binary exponentiation
     acc = one_bar # the accumulator is P
     for bit in reversed(range(exponent.bit_length())):
-        acc = monpro(acc, acc, modulus)  # square
+        acc = monpro(acc, acc, modulus, hardware_faithful)  # square
         if (exponent >> bit) & 1:
-            acc = monpro(acc, base_bar, modulus)  # multiply
+            acc = monpro(acc, base_bar, modulus, hardware_faithful)  # multiply
 
     # Convert back
-    return from_montgomery(acc, modulus)
+    return from_montgomery(acc, modulus, hardware_faithful)
 
 
 # -----------------------------
@@ -147,6 +84,7 @@ if __name__ == "__main__":
     print("Binary Montgomery:", C_bin)
     print("VLNW Montgomery:  ", C_vlnw)
     assert C_bin == C_vlnw, "VLNW does not match binary Montgomery!"
+    assert montgomery_pow_vlnw(M, key_e, key_n, d=4, hardware_faithful=True) == C_vlnw, "Bit-serial REDC differs!"
 
     # Test decryption-like double exponentiation
     M_bin = montgomery_pow(C_bin, key_d, key_n)
@@ -0,0 +1,71 @@
+# MESSAGE <-> WORD CONVERSION
+# Bulk replacements for the notebook's msg2word/word2msg, working on one bytes view of the buffer
+import numpy as np
+
+C_BLOCKSIZE_IN_BYTES = 32
+C_BLOCKSIZE_IN_32_BIT_WORDS = 8
+
+
+def msg2word(msg_array, out=None):
+    """
+    Convert 256-bit messages to a flat uint32 word array, word 0 least significant.
+
+    If out is given (e.g. a DMA cma_array) every block is written straight into
+    it through a byte view, with no intermediate list or concatenation; the
+    filled part of out is returned.
+    """
+    if out is None:
+        if not hasattr(msg_array, "__len__"):
+            msg_array = list(msg_array)
+        out = np.empty(len(msg_array) * C_BLOCKSIZE_IN_32_BIT_WORDS, dtype=np.uint32)
+    if out.dtype != np.uint32 or not out.flags.c_contiguous:
+        raise ValueError("Output buffer must be a contiguous uint32 array")
+
+    out_bytes = memoryview(out).cast("B")
+    capacity = len(out_bytes)
+    pos = 0
+    for msg in msg_array:
+        end = pos + C_BLOCKSIZE_IN_BYTES
+        if end > capacity:
+            raise ValueError("Output buffer is too small for the messages")
+        out_bytes[pos:end] = int(msg).to_bytes(C_BLOCKSIZE_IN_BYTES, byteorder="little")
+        pos = end
+    return out[:pos // 4]
+
+
+def word2msg(word_array):
+    """
+    Convert a flat uint32 word array back to a list of 256-bit messages,
+    with one int.from_bytes per block over a single bytes view.
+    """
+    words = np.ascontiguousarray(word_array, dtype="<u4")
+    if words.size % C_BLOCKSIZE_IN_32_BIT_WORDS != 0:
+        raise ValueError("The file size must be aligned to the block size")
+    data = memoryview(words).cast("B")
+    return [int.from_bytes(data[i:i + C_BLOCKSIZE_IN_BYTES], "little")
+            for i in range(0, len(data), C_BLOCKSIZE_IN_BYTES)]
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import random
+    import time
+
+    ma_in = [0x0000000011111111222222223333333344444444555555556666666677777777,
+             0x8888888899999999aaaaaaaabbbbbbbbccccccccddddddddeeeeeeeeffffffff]
+    wa = msg2word(ma_in)
+    assert list(wa[:2]) == [0x77777777, 0x66666666], "Word order differs from the notebook!"
+    assert word2msg(wa) == ma_in, "test_msg2msg: FAILED"
+
+    # Fill a preallocated buffer in place, like a DMA input buffer
+    msgs = [random.getrandbits(256) for _ in range(900)]
+    dma_buffer = np.zeros(len(msgs) * C_BLOCKSIZE_IN_32_BIT_WORDS, dtype=np.uint32)
+    start = time.time()
+    filled = msg2word(iter(msgs), out=dma_buffer)
+    back = word2msg(dma_buffer)
+    elapsed = time.time() - start
+    assert np.shares_memory(filled, dma_buffer)
+    assert back == msgs, "Round trip through the buffer failed!"
+    print(f"test_msg2msg: PASSED ({len(msgs)} blocks round trip in {elapsed * 1000:.1f} ms)")
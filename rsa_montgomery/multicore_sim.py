@@ -0,0 +1,186 @@
+# MULTI-CORE SIMULATOR
+# Discrete-event model of N rsa_core instances between rsa_msgin and rsa_msgout
+import heapq
+import os
+
+from hex_vectors import key_schedule, read_blocks, read_header, test_files
+from throughput_model import DatapathConfig, block_cycles
+
+ROUND_ROBIN = "round_robin"
+FIRST_FREE = "first_free"
+POLICIES = (ROUND_ROBIN, FIRST_FREE)
+
+# Core states
+IDLE, LOADING, BUSY, HOLDING = range(4)
+
+
+def simulate(service_cycles, cores=7, policy=FIRST_FREE, stream_cycles=8, reorder_slots=None):
+    """
+    Run one stream of blocks through the cores.
+
+    service_cycles[i] is the exponentiation time of block i. rsa_msgin feeds
+    the blocks in order, one at a time (stream_cycles each), to the core chosen
+    by the policy: ROUND_ROBIN sends block i to core i mod N and waits for it,
+    FIRST_FREE sends it to the lowest-numbered idle core. rsa_msgout takes the
+    results in input order, stream_cycles each. A finished block goes into the
+    reorder buffer (reorder_slots entries, None = unbounded); when the buffer is
+    full the core holds valid_out and stays blocked, as in S_OUT.
+
+    Returns makespan, per-core utilization, the largest number of finished
+    blocks waiting for an earlier, unfinished block and the dispatch order.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown dispatch policy {policy}")
+    n = len(service_cycles)
+    state = [IDLE] * cores
+    holding = {}               # block -> core holding its result
+    buffered = set()           # finished blocks in the reorder buffer
+    finished = [False] * n
+    first_unfinished = 0
+    busy_cycles = [0] * cores
+    assigned = [None] * n
+    events = []
+    seq = 0
+    now = 0
+    next_in = next_out = 0
+    stream_in_busy = stream_out_busy = False
+    max_waiting = 0
+
+    def push(t, kind, *data):
+        nonlocal seq
+        heapq.heappush(events, (t, seq, kind, data))
+        seq += 1
+
+    def dispatch():
+        nonlocal next_in, stream_in_busy
+        if stream_in_busy or next_in >= n:
+            return
+        if policy == ROUND_ROBIN:
+            core = next_in % cores
+            if state[core] != IDLE:
+                return
+        else:
+            idle = [c for c in range(cores) if state[c] == IDLE]
+            if not idle:
+                return
+            core = idle[0]
+        state[core] = LOADING
+        assigned[next_in] = core
+        stream_in_busy = True
+        push(now + stream_cycles, "loaded", core, next_in)
+        next_in += 1
+
+    def release_holding():
+        while holding and (reorder_slots is None or len(buffered) < reorder_slots):
+            block = min(holding)
+            core = holding.pop(block)
+            buffered.add(block)
+            state[core] = IDLE
+
+    def output():
+        nonlocal stream_out_busy
+        if stream_out_busy:
+            return
+        if next_out in buffered:
+            buffered.discard(next_out)
+        elif next_out in holding:
+            state[holding.pop(next_out)] = IDLE
+        else:
+            return
+        stream_out_busy = True
+        push(now + stream_cycles, "sent")
+
+    push(0, "start")
+    while events:
+        now, _, kind, data = heapq.heappop(events)
+        if kind == "loaded":
+            core, block = data
+            state[core] = BUSY
+            stream_in_busy = False
+            busy_cycles[core] += service_cycles[block]
+            push(now + service_cycles[block], "done", core, block)
+        elif kind == "done":
+            core, block = data
+            finished[block] = True
+            while first_unfinished < n and finished[first_unfinished]:
+                first_unfinished += 1
+            if reorder_slots is None or len(buffered) < reorder_slots:
+                buffered.add(block)
+                state[core] = IDLE
+            else:
+                state[core] = HOLDING
+                holding[block] = core
+        elif kind == "sent":
+            stream_out_busy = False
+            next_out += 1
+            release_holding()
+        output()
+        dispatch()
+        # Finished blocks that wait because an earlier block is still being computed
+        waiting = sum(1 for b in buffered if b > first_unfinished)
+        waiting += sum(1 for b in holding if b > first_unfinished)
+        max_waiting = max(max_waiting, waiting)
+
+    makespan = now
+    return {
+        'blocks': n,
+        'makespan_cycles': makespan,
+        'utilization': [busy / makespan if makespan else 0.0 for busy in busy_cycles],
+        'max_reorder_depth': max_waiting,
+        'assigned_cores': assigned,
+    }
+
+
+def file_service_cycles(paths, config):
+    """Per-block exponentiation cycles for the files streamed back-to-back (key latched per block)."""
+    cycles = []
+    for path in paths:
+        _, schedule = key_schedule(read_header(path))
+        latency = block_cycles(schedule, config)['total']
+        cycles.extend([latency] * len(read_blocks(path)))
+    return cycles
+
+
+def simulate_files(paths, config, policy=FIRST_FREE, reorder_slots=None):
+    """simulate() for the test files, with throughput in blocks/s at the configured clock."""
+    result = simulate(file_service_cycles(paths, config), config.cores, policy,
+                      config.stream_cycles, reorder_slots)
+    seconds = result['makespan_cycles'] / config.clock_hz
+    result['blocks_per_s'] = result['blocks'] / seconds if seconds else 0.0
+    return result
+
+
+# -----------------------------
+# Policy comparison on the long_test files
+# -----------------------------
+if __name__ == "__main__":
+    # Sanity: equal latencies, one core -> blocks back to back
+    single = simulate([100] * 10, cores=1, stream_cycles=8)
+    assert single['makespan_cycles'] == 10 * (8 + 100) + 8
+    assert single['max_reorder_depth'] == 0
+
+    # Sanity: a slow block followed by fast ones is overtaken with first-free dispatch
+    r = simulate([1000] + [100] * 8, cores=3, policy=FIRST_FREE)
+    assert r['max_reorder_depth'] > 0 and r['assigned_cores'][1:3] == [1, 2]
+    r = simulate([1000] + [100] * 8, cores=3, policy=ROUND_ROBIN)
+    assert r['assigned_cores'] == [0, 1, 2] * 3
+
+    paths = test_files()
+    pt, ct = [p for p in paths if "_pt" in p], [p for p in paths if "_ct" in p]
+    runs = [(os.path.basename(p)[-14:-7], [p]) for p in paths]
+    runs.append(("pt0..2 then ct3..5", pt + ct))
+    runs.append(("ct3..5 then pt0..2", ct + pt))
+
+    for cores in (1, 4, 7):
+        config = DatapathConfig(cores=cores)
+        print(f"\n{cores} core(s)")
+        for name, files in runs:
+            for policy in POLICIES:
+                line = f"  {name:20s} {policy:11s}"
+                for slots in (None, 0):
+                    r = simulate_files(files, config, policy, slots)
+                    util = sum(r['utilization']) / cores
+                    line += (f" | buffer {'inf' if slots is None else slots:>3}: {r['blocks_per_s']:7.0f} blocks/s, "
+                             f"util {util:6.1%}, reorder {r['max_reorder_depth']:2d}")
+                print(line)
+    print("\nMulti-core simulation done")
@@ -1,3 +1,6 @@
+from exponent_plan import get_plan
+
+
 def vlnw_schedule(exponent: int, window_size: int = 4):
     """
     Generate the VLNW execution schedule for a given exponent.
@@ -10,27 +13,8 @@ def vlnw_schedule(exponent: int, window_size: int = 4):
         odd_values (list): Odd indices used for precomputation
         schedule (list of dicts): Each dict has 'num_squares' and 'multiply' keys
     """
-    # Convert exponent to binary string, LSB first
-    bin_exp = bin(exponent)[2:][::-1]
-
-    i = 0
-    n = len(bin_exp)
-    windows = []
-
-    while i < n:
-        if bin_exp[i] == '0':
-            # zero window of length 1
-            windows.append((0, 1))
-            i += 1
-        else:
-            # nonzero window, up to window_size bits
-            w_len = min(window_size, n - i)
-            # collect bits for the window
-            window_bits = bin_exp[i:i + w_len]
-            # ensure LSB=1 (nonzero)
-            window_value = int(window_bits[::-1], 2)
-            windows.append((window_value, w_len))
-            i += w_len
+    # Windows LSB first, from the shared compiled plan
+    windows = get_plan(exponent, window_size).schedule() if exponent else []
 
     # build execution schedule
     schedule = []
@@ -0,0 +1,97 @@
+# PYNQ STAND-INS
+# Local mock of the rsa_acc MMIO and rsa_dma channels, for running the host driver without a board
+import asyncio
+import time
+
+import numpy as np
+
+from msg_convert import C_BLOCKSIZE_IN_32_BIT_WORDS
+
+# rsa_regio has 64 32-bit slave registers (C_S_AXI_ADDR_WIDTH = 8)
+REGISTER_COUNT = 64
+
+
+class MockMMIO:
+    """Register file with the pynq MMIO read/write interface, counting bus accesses."""
+
+    def __init__(self, register_count=REGISTER_COUNT):
+        self.array = np.zeros(register_count, dtype=np.uint32)
+        self.writes = 0
+        self.reads = 0
+
+    def write(self, offset, data):
+        """Write one 32-bit word (int) or a run of words (bytes) at a byte offset."""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            words = np.frombuffer(bytes(data), dtype="<u4")
+            self.array[offset // 4:offset // 4 + len(words)] = words
+        else:
+            self.array[offset // 4] = data
+        self.writes += 1
+
+    def read(self, offset, length=4):
+        self.reads += 1
+        return int(self.array[offset // 4])
+
+    def block(self, address):
+        """256-bit value stored at a byte address (8 little-endian words)."""
+        words = self.array[address // 4:address // 4 + C_BLOCKSIZE_IN_32_BIT_WORDS]
+        return int.from_bytes(words.astype("<u4").tobytes(), "little")
+
+
+class MockChannel:
+    """One DMA channel: transfer() starts, wait() blocks until done, wait_async() awaits it."""
+
+    def __init__(self, dma):
+        self._dma = dma
+        self.buffer = None
+        self.transfers = 0
+
+    def transfer(self, buffer):
+        self.buffer = buffer
+        self.transfers += 1
+
+    def wait(self):
+        if self._dma.latency:
+            time.sleep(self._dma.latency)
+        self._dma._complete()
+
+    async def wait_async(self):
+        """Like the interrupt-driven wait_async of pynq DMA channels: sleeps instead of polling."""
+        await asyncio.sleep(self._dma.latency)
+        self._dma._complete()
+
+
+class MockDMA:
+    """
+    rsa_dma stand-in. When the receive channel is waited on, the last sent
+    buffer is run through process(words, mmio) into the receive buffer.
+    The default process is the XOR test algorithm of the notebook: C = M xor n.
+    latency is the time in seconds a transfer takes to complete.
+    """
+
+    def __init__(self, mmio, process=None, latency=0.0):
+        self.mmio = mmio
+        self.process = process or xor_process
+        self.latency = latency
+        self.sendchannel = MockChannel(self)
+        self.recvchannel = MockChannel(self)
+
+    def _complete(self):
+        src, dst = self.sendchannel.buffer, self.recvchannel.buffer
+        if src is None or dst is None:
+            return
+        if len(src) != len(dst):
+            raise RuntimeError("Send and receive transfers differ in length")
+        dst[:] = self.process(np.asarray(src), self.mmio)
+        self.sendchannel.buffer = self.recvchannel.buffer = None
+
+
+def xor_process(words, mmio):
+    """C_ENCR_ALGORITHM_XOR: every block xor key_n (registers 0..7)."""
+    key_n_words = mmio.array[:C_BLOCKSIZE_IN_32_BIT_WORDS]
+    return (words.reshape(-1, C_BLOCKSIZE_IN_32_BIT_WORDS) ^ key_n_words).reshape(-1)
+
+
+def mock_allocate(words):
+    """Stand-in for pynq's contiguous buffer allocation."""
+    return np.zeros(words, dtype=np.uint32)
@@ -0,0 +1,175 @@
+# EXPONENT RECODING
+# Minimum-MonPro schedule entries by dynamic programming over the exponent bits
+from hw_schedule import HW_FORMAT, pack_schedule, schedule_entries
+
+# exponentiation.vhd: toMont(A), toMont(1), A^2, A^3, A^5..A^15 and fromMont
+CONVERSION_MONPROS = 3
+
+
+def table_monpros(window_size):
+    """MonPros to build the odd powers A^3..A^(2^w - 1) (A^2 included)."""
+    return 0 if window_size <= 1 else 1 << (window_size - 1)
+
+
+def entry_monpros(entries):
+    """Main loop MonPros of MSB-first entries: L squarings, plus a multiply when u != 0."""
+    return sum(L + (1 if u else 0) for u, L in entries)
+
+
+def schedule_monpros(entries, window_size, fixed_table=True, fmt=HW_FORMAT):
+    """
+    Total MonPros of one exponentiation with these entries.
+    With fixed_table the table always holds A^1..A^(2^value_bits - 1), as in exponentiation.vhd.
+    """
+    table = table_monpros(fmt.value_bits if fixed_table else window_size)
+    return CONVERSION_MONPROS + table + entry_monpros(entries)
+
+
+def optimal_entries(exponent, window_size=4, max_length=4, max_entries=None):
+    """
+    MSB-first (u, L) entries of exponent with the fewest multiplies.
+
+    Every entry covers L <= max_length bits starting at bit i (LSB side):
+    a zero entry needs bits i..i+L-1 all zero, a multiply entry needs bit i
+    set (u odd, so it is in the odd-power table) and u < 2^window_size; its
+    top bits may be zero, which absorbs short zero runs. The squarings always
+    add up to the bit length, so only the multiplies vary. Ties go to fewer
+    entries. With max_entries, the fewest multiplies within that count.
+    """
+    if exponent <= 0:
+        return []
+    nbits = exponent.bit_length()
+    value_limit = 1 << window_size
+
+    def moves(i):
+        """(L, u) entries that may start at bit i."""
+        bit = (exponent >> i) & 1
+        for L in range(1, min(max_length, nbits - i) + 1):
+            u = (exponent >> i) & ((1 << L) - 1)
+            if bit == 0:
+                if u != 0:
+                    break
+                yield L, 0
+            elif u < value_limit:
+                yield L, u
+
+    # best[i] = (multiplies, entries) for bits i..nbits-1
+    INF = (nbits + 1, nbits + 1)
+    best = [INF] * (nbits + 1)
+    choice = [None] * (nbits + 1)
+    best[nbits] = (0, 0)
+    for i in range(nbits - 1, -1, -1):
+        for L, u in moves(i):
+            mults, count = best[i + L]
+            cost = (mults + (1 if u else 0), count + 1)
+            if cost < best[i]:
+                best[i], choice[i] = cost, (u, L)
+    if best[0] == INF:
+        raise ValueError("Exponent cannot be recoded with these limits")
+
+    if max_entries is not None and best[0][1] > max_entries:
+        return _bounded_entries(exponent, nbits, moves, max_entries)
+
+    entries = []
+    i = 0
+    while i < nbits:
+        entries.append(choice[i])
+        i += choice[i][1]
+    entries.reverse()
+    return entries
+
+
+def _bounded_entries(exponent, nbits, moves, max_entries):
+    """Fewest multiplies using at most max_entries entries: mults[i][k] over (bit, entries left)."""
+    INF = nbits + 1
+    mults = [[INF] * (max_entries + 1) for _ in range(nbits + 1)]
+    choice = [[None] * (max_entries + 1) for _ in range(nbits + 1)]
+    for k in range(max_entries + 1):
+        mults[nbits][k] = 0
+    for i in range(nbits - 1, -1, -1):
+        options = list(moves(i))
+        for k in range(1, max_entries + 1):
+            for L, u in options:
+                cost = mults[i + L][k - 1] + (1 if u else 0)
+                if cost < mults[i][k]:
+                    mults[i][k], choice[i][k] = cost, (u, L)
+    if mults[0][max_entries] >= INF:
+        raise ValueError(f"Exponent needs more than {max_entries} schedule entries")
+
+    entries = []
+    i, k = 0, max_entries
+    while i < nbits:
+        entries.append(choice[i][k])
+        i, k = i + choice[i][k][1], k - 1
+    entries.reverse()
+    return entries
+
+
+def optimize_schedule(exponent, fmt=HW_FORMAT, fixed_table=True):
+    """
+    Search the window sizes the format allows (u < 2^w, w <= value_bits) and
+    return (entries, window_size, total MonPros) with the fewest MonPros.
+    Entry lengths run up to 2^length_bits; the entries fit in fmt.
+    """
+    max_length = 1 << fmt.length_bits
+    best = None
+    for w in range(1, fmt.value_bits + 1):
+        try:
+            entries = optimal_entries(exponent, w, max_length, fmt.max_entries)
+        except ValueError:
+            continue
+        total = schedule_monpros(entries, w, fixed_table, fmt)
+        if best is None or (total, len(entries)) < (best[2], len(best[0])):
+            best = (entries, w, total)
+    if best is None:
+        raise ValueError(f"Exponent does not fit in {fmt}")
+    return best
+
+
+def recoding_report(exponent, fmt=HW_FORMAT, fixed_table=True, cycles_per_monpro=122):
+    """MonPros and cycles per block of the greedy hardware schedule against the optimum."""
+    greedy = schedule_entries(exponent, fmt.value_bits)
+    entries, w, total = optimize_schedule(exponent, fmt, fixed_table)
+    greedy_total = schedule_monpros(greedy, fmt.value_bits, fixed_table, fmt)
+    return {
+        'greedy_entries': len(greedy),
+        'greedy_monpros': greedy_total,
+        'optimal_entries': len(entries),
+        'optimal_window': w,
+        'optimal_monpros': total,
+        'cycles_saved_per_block': (greedy_total - total) * cycles_per_monpro,
+        'schedule': pack_schedule(entries, fmt),
+    }
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    from hw_schedule import unpack_schedule, verify_msb
+
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+
+    for exp in [key_d, key_e] + [random.getrandbits(256) | 1 for _ in range(50)]:
+        entries, w, total = optimize_schedule(exp)
+        assert verify_msb(entries) == exp, "Recoded entries do not reconstruct the exponent!"
+        assert all(u == 0 or (u & 1 and u < 16) for u, _ in entries)
+        assert all(1 <= L <= 4 for _, L in entries)
+        greedy = schedule_entries(exp)
+        assert total <= schedule_monpros(greedy, 4), "Optimum is worse than the greedy schedule!"
+        assert unpack_schedule(pack_schedule(entries)) == entries
+
+    # Entry count limit: trade multiplies for fewer entries
+    bounded = optimal_entries(key_d, 4, 4, max_entries=75)
+    assert verify_msb(bounded) == key_d and len(bounded) <= 75
+
+    for (name, exp), fixed in [(key, fixed) for fixed in (True, False)
+                               for key in (("key_d", key_d), ("key_e", key_e))]:
+        report = recoding_report(exp, fixed_table=fixed)
+        print(f"{name} ({'fixed' if fixed else 'sized'} table): greedy {report['greedy_monpros']} MonPros / {report['greedy_entries']} entries, "
+              f"optimal {report['optimal_monpros']} MonPros / {report['optimal_entries']} entries "
+              f"(w={report['optimal_window']}), {report['cycles_saved_per_block']} cycles saved per block")
+    print("Recoding test passed!")
@@ -0,0 +1,225 @@
+# RESULT DIFF
+# Vectorized HW-vs-SW comparison of uint32 output buffers, with a traced recompute of failing blocks
+import numpy as np
+
+from monpro_pipeline import TABLE_SIZE, WORDS, exponentiation_ops
+from monpro_trace import TRACE_DTYPE, trace_monpro, words_to_int
+from montgomery_batch import BLOCK_WORDS
+from montgomery_context import get_context
+
+BLOCK_BITS = 32 * BLOCK_WORDS
+
+WORD_DIFF_DTYPE = np.dtype([
+    ('block', '<u4'),
+    ('word', 'u1'),
+    ('hw', '<u4'),
+    ('sw', '<u4'),
+    ('xor', '<u4'),
+])
+
+
+def _blocks(words):
+    words = np.ascontiguousarray(words, dtype="<u4")
+    if words.size % BLOCK_WORDS:
+        raise ValueError("Buffer size must be a whole number of blocks")
+    return words.reshape(-1, BLOCK_WORDS)
+
+
+class DiffReport:
+    """
+    Result of compare_words.
+
+    bad_blocks: indices of the blocks with any differing word.
+    word_diffs: one WORD_DIFF_DTYPE record per differing 32-bit word.
+    bit_histogram[k]: number of failing blocks with bit k (0 = LSB of word 0) flipped.
+    word_histogram[w]: number of failing blocks with word w wrong.
+    """
+
+    def __init__(self, hw, sw):
+        self.hw = hw
+        self.sw = sw
+        diff = hw != sw
+        self.blocks = len(hw)
+        self.bad_blocks = np.flatnonzero(diff.any(axis=1))
+        rows, cols = np.nonzero(diff)
+        self.word_diffs = np.zeros(len(rows), dtype=WORD_DIFF_DTYPE)
+        self.word_diffs['block'] = rows
+        self.word_diffs['word'] = cols
+        self.word_diffs['hw'] = hw[rows, cols]
+        self.word_diffs['sw'] = sw[rows, cols]
+        self.word_diffs['xor'] = hw[rows, cols] ^ sw[rows, cols]
+        xor = np.ascontiguousarray(hw[self.bad_blocks] ^ sw[self.bad_blocks])
+        bits = np.unpackbits(xor.view(np.uint8), axis=1, bitorder="little")
+        self.bit_histogram = bits.sum(axis=0, dtype=np.int64)
+        self.bits_per_block = bits.sum(axis=1, dtype=np.int64)
+        self.word_histogram = diff[self.bad_blocks].sum(axis=0)
+
+    @property
+    def ok(self):
+        return len(self.bad_blocks) == 0
+
+    @property
+    def first_mismatch(self):
+        return int(self.bad_blocks[0]) if len(self.bad_blocks) else None
+
+    def summary(self, limit=10):
+        if self.ok:
+            return f"{self.blocks} blocks, all equal"
+        lines = [f"{len(self.bad_blocks)} of {self.blocks} blocks differ, first at block {self.first_mismatch}",
+                 f"  wrong words per position: {self.word_histogram.tolist()}",
+                 f"  flipped bits per block: min {self.bits_per_block.min()}, max {self.bits_per_block.max()}"]
+        hot = np.argsort(self.bit_histogram)[::-1][:5]
+        lines.append("  most flipped bits: " + ", ".join(
+            f"{k} ({self.bit_histogram[k]})" for k in hot if self.bit_histogram[k]))
+        for rec in self.word_diffs[:limit]:
+            lines.append(f"  block {rec['block']:5d} word {rec['word']}: "
+                         f"hw {rec['hw']:08x} sw {rec['sw']:08x} xor {rec['xor']:08x}")
+        if len(self.word_diffs) > limit:
+            lines.append(f"  ... {len(self.word_diffs) - limit} more words")
+        return "\n".join(lines)
+
+
+def compare_words(hw_words, sw_words):
+    """Compare two uint32 result buffers (flat or (N, 8), msg2word layout)."""
+    hw, sw = _blocks(hw_words), _blocks(sw_words)
+    if hw.shape != sw.shape:
+        raise ValueError(f"HW has {len(hw)} blocks, SW has {len(sw)}")
+    return DiffReport(hw, sw)
+
+
+def _monpro_names(count):
+    """Phase of every MonPro in exponentiation_ops order."""
+    names = ["toMont(A)", "toMont(1)", "A^2"] + [f"A^{2 * k + 1}" for k in range(1, TABLE_SIZE)]
+    names += [f"main {k}" for k in range(count - len(names) - 1)]
+    return (names + ["fromMont"])[:count]
+
+
+class BlockDiagnosis:
+    """
+    Traced recompute of one failing block: every MonPro of the exponentiation
+    (phase name, operands, result) and the word-level trace of all of them
+    (TRACE_DTYPE, 'case' = MonPro index), plus a guess at what the HW output is.
+    """
+
+    def __init__(self, block, message, hw, sw, monpros, trace, modulus):
+        self.block = block
+        self.message = message
+        self.hw = hw
+        self.sw = sw
+        self.monpros = monpros
+        self.trace = trace
+        self.cause = self._classify(modulus)
+
+    def _classify(self, n):
+        hw, sw = self.hw, self.sw
+        last = self.monpros[-1]
+        if hw == sw:
+            return "matches the recomputed result (SW reference was wrong)"
+        if hw == last['a']:
+            return "missing fromMont: output is still in Montgomery form"
+        if hw == sw + n:
+            return "missing final U - n subtraction in fromMont"
+        if hw == self.message:
+            return "input passed through unchanged"
+        for k, mp in enumerate(self.monpros):
+            if hw == mp['r']:
+                return f"equals MonPro {k} ({mp['name']}): stopped or latched early"
+            if hw == mp['r'] + n and mp['r'] + n < 1 << BLOCK_BITS:
+                return f"equals MonPro {k} ({mp['name']}) without its final subtraction"
+        hw_words = _blocks(np.frombuffer(hw.to_bytes(32, "little"), dtype="<u4"))[0]
+        sw_words = _blocks(np.frombuffer(sw.to_bytes(32, "little"), dtype="<u4"))[0]
+        if (hw_words[::-1] == sw_words).all():
+            return "word order reversed"
+        if hw == int.from_bytes(sw.to_bytes(32, "little"), "big"):
+            return "byte order reversed"
+        if sorted(hw_words) == sorted(sw_words):
+            return "words permuted"
+        bad = np.flatnonzero(hw_words != sw_words).tolist()
+        return f"unexplained difference in words {bad}"
+
+    def __repr__(self):
+        return f"BlockDiagnosis(block={self.block}, monpros={len(self.monpros)}, cause={self.cause!r})"
+
+
+def trace_block(message, exponent, modulus, window_size=4):
+    """Run one exponentiation through trace_monpro: (result, MonPro list, word trace)."""
+    n_prime = get_context(modulus).n0_inv
+    ops = exponentiation_ops(message, exponent, modulus, window_size)
+    monpros, traces = [], []
+    a, b = next(ops)
+    while True:
+        trace = np.zeros(WORDS, dtype=TRACE_DTYPE)
+        r, subtracted = trace_monpro(a, b, modulus, n_prime, len(monpros), trace)
+        monpros.append({'a': a, 'b': b, 'r': r, 'subtracted': subtracted})
+        traces.append(trace)
+        try:
+            a, b = ops.send(r)
+        except StopIteration as stop:
+            result = stop.value
+            break
+    for mp, name in zip(monpros, _monpro_names(len(monpros))):
+        mp['name'] = name
+    return result, monpros, np.concatenate(traces)
+
+
+def diagnose(report, input_words, exponent, modulus, limit=8, window_size=4):
+    """Recompute the first limit failing blocks of a DiffReport with the tracing MonPro."""
+    inputs = _blocks(input_words)
+    diagnoses = []
+    for block in report.bad_blocks[:limit]:
+        message = words_to_int(inputs[block])
+        result, monpros, trace = trace_block(message, exponent, modulus, window_size)
+        diagnoses.append(BlockDiagnosis(int(block), message, words_to_int(report.hw[block]),
+                                        result, monpros, trace, modulus))
+    return diagnoses
+
+
+# -----------------------------
+# Simple test: injected faults on a long_test file
+# -----------------------------
+if __name__ == "__main__":
+    import time
+
+    from golden_model import golden_outputs
+    from hex_vectors import HexVectorFile, test_files
+    from msg_convert import msg2word
+
+    with HexVectorFile(test_files()[1], sidecar=False) as vectors:     # pt1, 882 blocks
+        inputs = np.array(vectors.words)
+        exponent, _ = vectors.key_schedule()
+        n = vectors.header['KEY N']
+    sw = msg2word(golden_outputs(inputs, exponent, n, workers=1))
+    assert compare_words(sw, sw).ok
+
+    ctx = get_context(n)
+    hw = sw.copy().reshape(-1, BLOCK_WORDS)
+    faults = {
+        17: "unexplained difference in words [3]",
+        123: "word order reversed",
+        400: "missing final U - n subtraction in fromMont",
+        600: "missing fromMont: output is still in Montgomery form",
+        850: "input passed through unchanged",
+    }
+    hw[17, 3] ^= 1 << 9
+    hw[123] = hw[123][::-1]
+    for block, value in ((400, words_to_int(hw[400]) + n),
+                         (600, words_to_int(hw[600]) * ctx.r_mod_n % n),
+                         (850, words_to_int(inputs[850]))):
+        hw[block] = msg2word([value])
+
+    start = time.time()
+    report = compare_words(hw, sw)
+    t_compare = time.time() - start
+    assert report.bad_blocks.tolist() == sorted(faults)
+    assert report.first_mismatch == 17 and report.bit_histogram[3 * 32 + 9] >= 1
+    print(report.summary())
+
+    start = time.time()
+    diagnoses = diagnose(report, inputs, exponent, n)
+    t_diagnose = time.time() - start
+    for diag in diagnoses:
+        assert diag.cause == faults[diag.block], (diag.block, diag.cause)
+        assert diag.monpros[-1]['name'] == "fromMont" and len(diag.trace) == WORDS * len(diag.monpros)
+        print(f"  {diag}")
+    print(f"compare {t_compare * 1000:.1f} ms, traced recompute of {len(diagnoses)} blocks {t_diagnose:.2f} s")
+    print("Result diff test passed!")
@@ -0,0 +1,163 @@
+# CRT PRIVATE KEY
+# Decryption with two half-width Montgomery exponentiations and Garner recombination
+import high_level_high_radix_montgomery_vlnw as hr
+from montgomery_context import WORD_BITS, get_context
+
+# MonPro latency of the current word-serial hardware: 15 cycles per 32-bit word + 2 (122 for 256 bits)
+MONPRO_CYCLES_PER_WORD = 15
+MONPRO_OVERHEAD_CYCLES = 2
+
+
+def monpro_cycles(bits):
+    """Cycles for one MonPro on a bits-wide modulus in the word-serial datapath."""
+    words = -(-bits // WORD_BITS)
+    return words * MONPRO_CYCLES_PER_WORD + MONPRO_OVERHEAD_CYCLES
+
+
+def r_bits(m):
+    """Montgomery R of the word-serial datapath for modulus m: whole 32-bit words."""
+    return -(-m.bit_length() // WORD_BITS) * WORD_BITS
+
+
+class CRTPrivateKey:
+    """
+    RSA private key (p, q, d) with the CRT constants precomputed once:
+    dp = d mod (p-1), dq = d mod (q-1), q_inv = q^-1 mod p.
+
+    Both half exponentiations and the Garner step run on the high-radix
+    monpro_hr kernel with half-width contexts (R = 2^128 for 128-bit primes),
+    so every MonPro is counted in hr.mul_count.
+    """
+
+    def __init__(self, p, q, d, window_size=4):
+        if p == q:
+            raise ValueError("p and q must be distinct primes")
+        self.p = p
+        self.q = q
+        self.d = d
+        self.n = p * q
+        self.dp = d % (p - 1)
+        self.dq = d % (q - 1)
+        self.q_inv = pow(q, -1, p)
+        self.window_size = window_size
+
+        # Half-width Montgomery contexts: R = 2^(words of p) instead of 2^256
+        self.ctx_p = get_context(p, WORD_BITS, r_bits(p))
+        self.ctx_q = get_context(q, WORD_BITS, r_bits(q))
+        # q_inv in the Montgomery domain: one MonPro gives (m1 - m2) * q_inv mod p
+        self.q_inv_bar = hr.to_montgomery(self.q_inv, p, self.ctx_p)
+
+    def _pow(self, c, exponent, ctx):
+        return hr.montgomery_pow_vlnw_hr(c % ctx.n, exponent, ctx.n, self.window_size, ctx=ctx)
+
+    def _garner(self, m1, m2):
+        # m = m2 + q * ((m1 - m2) * q_inv mod p)
+        h = hr.monpro_hr((m1 - m2) % self.p, self.q_inv_bar, self.p, ctx=self.ctx_p)
+        return m2 + self.q * h
+
+    def decrypt_batch(self, ciphertexts):
+        """Yield c^d mod n for every block, in order."""
+        for c in ciphertexts:
+            c = int(c)
+            yield self._garner(self._pow(c, self.dp, self.ctx_p), self._pow(c, self.dq, self.ctx_q))
+
+    def decrypt(self, c):
+        """M = C^d mod n"""
+        return next(self.decrypt_batch([c]))
+
+    def cycle_report(self, c=2):
+        """
+        Compare MonPro counts and datapath cycles of the full-width VLNW
+        exponentiation against CRT on two half-width MonPro cores. The counts
+        are the monpro_hr calls (hr.mul_count) made while decrypting c, both
+        ways. The final m2 + q*h of Garner is a plain multiply-add, not a MonPro.
+        """
+        def counted(run):
+            start = hr.mul_count
+            result = run()
+            return result, hr.mul_count - start
+
+        full_ctx = get_context(self.n, WORD_BITS, r_bits(self.n))
+        full, full_mults = counted(lambda: self._pow(c, self.d, full_ctx))
+        m1, p_mults = counted(lambda: self._pow(c, self.dp, self.ctx_p))
+        m2, q_mults = counted(lambda: self._pow(c, self.dq, self.ctx_q))
+        crt, garner_mults = counted(lambda: self._garner(m1, m2))
+        if crt != full:
+            raise ArithmeticError("CRT and full-width results differ")
+
+        full_cycles = full_mults * monpro_cycles(r_bits(self.n))
+        p_cycles = p_mults * monpro_cycles(r_bits(self.p))
+        q_cycles = q_mults * monpro_cycles(r_bits(self.q))
+        garner_cycles = garner_mults * monpro_cycles(r_bits(self.p))
+
+        return {
+            'full_monpros': full_mults,
+            'full_cycles': full_cycles,
+            'crt_monpros': p_mults + q_mults + garner_mults,
+            'crt_cycles_one_core': p_cycles + q_cycles + garner_cycles,
+            'crt_cycles_two_cores': max(p_cycles, q_cycles) + garner_cycles,
+        }
+
+
+# -----------------------------
+# Simple test with a random 256-bit key
+# -----------------------------
+if __name__ == "__main__":
+    import random
+
+    from exponent_plan import get_plan
+
+    def is_probable_prime(m, rounds=32):
+        if m < 2:
+            return False
+        for sp in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29):
+            if m % sp == 0:
+                return m == sp
+        s, t = 0, m - 1
+        while t % 2 == 0:
+            s, t = s + 1, t // 2
+        for _ in range(rounds):
+            x = pow(random.randrange(2, m - 1), t, m)
+            if x in (1, m - 1):
+                continue
+            for _ in range(s - 1):
+                x = pow(x, 2, m)
+                if x == m - 1:
+                    break
+            else:
+                return False
+        return True
+
+    def random_prime(bits):
+        while True:
+            cand = random.getrandbits(bits) | (1 << (bits - 1)) | (1 << (bits - 2)) | 1
+            if is_probable_prime(cand):
+                return cand
+
+    e = 0x10001
+    while True:
+        p, q = random_prime(128), random_prime(128)
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % e != 0:
+            break
+    d = pow(e, -1, phi)
+    key = CRTPrivateKey(p, q, d)
+
+    blocks = [random.randrange(key.n) for _ in range(200)]
+    cts = [pow(m, e, key.n) for m in blocks]
+    assert list(key.decrypt_batch(cts)) == blocks, "CRT decryption failed!"
+
+    # The counts are real monpro_hr calls: toMont(C), toMont(1), the table, the main loop, fromMont
+    def expected_monpros(exponent):
+        plan = get_plan(exponent, key.window_size)
+        table = plan.table_size if plan.table_size > 1 else 0     # M^2, M^3..M^max
+        return 2 + table + plan.monpro_count() + 1
+
+    report = key.cycle_report(cts[0])
+    assert report['full_monpros'] == expected_monpros(d)
+    assert report['crt_monpros'] == expected_monpros(key.dp) + expected_monpros(key.dq) + 1
+    for name, value in report.items():
+        print(f"{name:22s}: {value}")
+    print(f"speedup (one core)  : {report['full_cycles'] / report['crt_cycles_one_core']:.2f}x")
+    print(f"speedup (two cores) : {report['full_cycles'] / report['crt_cycles_two_cores']:.2f}x")
+    print("CRT test passed!")
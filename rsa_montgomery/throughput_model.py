@@ -0,0 +1,147 @@
+# THROUGHPUT MODEL
+# Cycle estimate of exponentiation.vhd + monpro.vhd per block and per test file, without simulation
+import os
+
+from hex_vectors import key_schedule, read_blocks, read_header, test_files
+from hw_schedule import HW_FORMAT, unpack_schedule
+
+# Measured in EXPONENTIATION_FUNGERER/"39880 cycles": one key_d block, 75 MHz
+MEASURED_BLOCK_CYCLES = 39880
+
+
+class DatapathConfig:
+    """
+    Design parameters of one accelerator build.
+
+    MonPro (monpro.vhd): for each of the words, three steps (Ai*B + U, u0*n',
+    M*n + U) each pass the stages-deep pipeline, then output_stages cycles
+    for the final subtraction: 8 * 3 * 5 + 2 = 122 cycles. With interleave > 1
+    that many messages share a core's pipeline and every step takes
+    interleave - 1 extra cycles. monpro_cycles overrides the derived figure,
+    e.g. with a cycle count measured in simulation.
+
+    Handshakes (exponentiation.vhd / fsm.vhd): op_handshake cycles per main loop
+    MonPro (S_WAIT_OP, S_OP_SQ/MUL, S_WAIT_MP, S_CHECK_VLNW_DONE), entry_cycles
+    per schedule entry (READ, SHIFT_state), precompute_handshake per
+    conversion/table MonPro, msg_in/msg_out cycles for the valid/ready transfer
+    and stream_cycles per block for the 32-bit AXI stream into and out of the cores.
+    """
+
+    def __init__(self, clock_hz=75e6, cores=1, stages=5, interleave=1, words=8, steps=3,
+                 output_stages=2, table_size=8, op_handshake=4, entry_cycles=2,
+                 precompute_handshake=2, msg_in_cycles=1, msg_out_cycles=1, stream_cycles=8,
+                 monpro_cycles=None):
+        if not 1 <= interleave <= stages:
+            raise ValueError("Interleave must be between 1 and the pipeline depth")
+        if monpro_cycles is not None and monpro_cycles < 1:
+            raise ValueError("MonPro cycle count must be positive")
+        self.clock_hz = clock_hz
+        self.cores = cores
+        self.stages = stages
+        self.interleave = interleave
+        self.words = words
+        self.steps = steps
+        self.output_stages = output_stages
+        self.table_size = table_size
+        self.op_handshake = op_handshake
+        self.entry_cycles = entry_cycles
+        self.precompute_handshake = precompute_handshake
+        self.msg_in_cycles = msg_in_cycles
+        self.msg_out_cycles = msg_out_cycles
+        self.stream_cycles = stream_cycles
+        self._monpro_cycles = monpro_cycles
+
+    @property
+    def monpro_cycles(self):
+        if self._monpro_cycles is not None:
+            return self._monpro_cycles
+        return self.words * self.steps * (self.stages + self.interleave - 1) + self.output_stages
+
+    def __repr__(self):
+        return (f"DatapathConfig({self.clock_hz / 1e6:.0f} MHz, cores={self.cores}, "
+                f"stages={self.stages}, interleave={self.interleave}, monpro={self.monpro_cycles})")
+
+
+def block_cycles(schedule, config, fmt=HW_FORMAT):
+    """Cycle breakdown of one exponentiation with a packed schedule (registers as ints)."""
+    entries = unpack_schedule(schedule, fmt)
+    squares = sum(L for _, L in entries)
+    multiplies = sum(1 for u, _ in entries if u)
+    monpro = config.monpro_cycles
+
+    conversion = 3 * (monpro + config.precompute_handshake)           # toMont(A), toMont(1), fromMont
+    precompute = config.table_size * (monpro + config.precompute_handshake)  # A^2, A^3..A^15
+    main = (squares + multiplies) * (monpro + config.op_handshake) + len(entries) * config.entry_cycles
+    handshake = config.msg_in_cycles + config.msg_out_cycles
+    return {
+        'entries': len(entries),
+        'monpros': 3 + config.table_size + squares + multiplies,
+        'conversion': conversion,
+        'precompute': precompute,
+        'main_loop': main,
+        'handshake': handshake,
+        'total': conversion + precompute + main + handshake,
+    }
+
+
+def file_estimate(schedule, blocks, config, fmt=HW_FORMAT):
+    """
+    Whole-file estimate: blocks are spread over cores * interleave slots;
+    each wave of slots takes one block latency, the stream in/out of the
+    first and last block is not hidden, and the stream caps the block rate.
+    """
+    latency = block_cycles(schedule, config, fmt)['total']
+    slots = config.cores * config.interleave
+    waves = -(-blocks // slots)
+    cycles = max(waves * latency, blocks * config.stream_cycles) + 2 * config.stream_cycles
+    seconds = cycles / config.clock_hz
+    return {
+        'blocks': blocks,
+        'block_latency_cycles': latency,
+        'block_latency_us': latency / config.clock_hz * 1e6,
+        'file_cycles': cycles,
+        'file_ms': seconds * 1e3,
+        'blocks_per_s': blocks / seconds if seconds else 0.0,
+    }
+
+
+def estimate_test_files(config, paths=None):
+    """Estimate for every long_test input file: {file name: file_estimate}."""
+    report = {}
+    for path in paths or test_files():
+        _, schedule = key_schedule(read_header(path))
+        report[os.path.basename(path)] = file_estimate(schedule, len(read_blocks(path)), config)
+    return report
+
+
+# -----------------------------
+# Design comparison
+# -----------------------------
+if __name__ == "__main__":
+    from hw_schedule import encode_exponent
+
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+
+    base = DatapathConfig()
+    cycles = block_cycles(encode_exponent(key_d), base)
+    error = (cycles['total'] - MEASURED_BLOCK_CYCLES) / MEASURED_BLOCK_CYCLES
+    print(f"key_d block: {cycles['total']} cycles predicted, {MEASURED_BLOCK_CYCLES} measured ({error:+.2%})")
+    assert abs(error) < 0.01, "Model is off the measured cycle count!"
+
+    # A measured MonPro latency replaces the derived one in every MonPro of the block
+    measured = block_cycles(encode_exponent(key_d), DatapathConfig(monpro_cycles=130))
+    assert measured['total'] - cycles['total'] == cycles['monpros'] * (130 - base.monpro_cycles)
+
+    designs = {
+        "5-stage, 1 core, 75 MHz": base,
+        "6-stage, 1 core, 88 MHz": DatapathConfig(clock_hz=88e6, stages=6),
+        "5-stage, 7 cores, 75 MHz": DatapathConfig(cores=7),
+        "5-stage, 5 interleaved, 75 MHz": DatapathConfig(interleave=5),
+        "5-stage, 7 cores x 5 interleaved": DatapathConfig(cores=7, interleave=5),
+    }
+    for name, config in designs.items():
+        print(f"\n{name} (MonPro {config.monpro_cycles} cycles)")
+        for file_name, est in estimate_test_files(config).items():
+            print(f"  {file_name[-14:-7]}: {est['blocks']:4d} blocks, "
+                  f"{est['block_latency_us']:7.1f} us/block, {est['file_ms']:8.2f} ms, "
+                  f"{est['blocks_per_s']:9.0f} blocks/s")
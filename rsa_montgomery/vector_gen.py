@@ -0,0 +1,125 @@
+# TEST VECTOR GENERATOR
+# Writes long_test-style input files and their expected outputs, streamed to disk
+import os
+import random
+
+from golden_model import CHUNK_SIZE, golden_outputs
+from key_registry import get_key_context
+
+BLOCK_HEX = 64
+
+
+def header_lines(key_n, key_e, key_d, command, window_size=4):
+    """
+    Header of a long_test input file: keys, COMMAND (1 = encrypt) and the
+    constants the accelerator loads (N_PRIME, R2_MOD_N and both packed schedules).
+    """
+    dec = get_key_context(key_d, key_n, window_size).header()
+    enc = get_key_context(key_e, key_n, window_size).header()
+    fields = [
+        ("KEY N", f"{key_n:0{BLOCK_HEX}x}"),
+        ("KEY E", f"{key_e:0{BLOCK_HEX}x}"),
+        ("KEY D", f"{key_d:0{BLOCK_HEX}x}"),
+        ("COMMAND", f"{command:d}"),
+        ("N_PRIME", dec['N_PRIME']),
+        ("R2_MOD_N", dec['R2_MOD_N']),
+    ]
+    fields += [(f"DECR_SCHED{i}", reg) for i, reg in enumerate(dec['SCHED'])]
+    fields += [(f"ENCR_SCHED{i}", reg) for i, reg in enumerate(enc['SCHED'])]
+    lines = []
+    for name, value in fields:
+        lines += [f"# {name}", value]
+    return lines + [""]
+
+
+def random_messages(count, modulus, seed=None):
+    """count random blocks below modulus, generated lazily."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield rng.randrange(modulus)
+
+
+def write_vectors(in_path, out_path, messages, key_n, key_e, key_d, command,
+                  workers=None, chunk_size=CHUNK_SIZE, window_size=4):
+    """
+    Write the input file (header + blocks) and the expected output file
+    (one result block per line) for messages, an iterable of ints.
+
+    Blocks are written to the input file as the process pool pulls them and
+    every result as soon as it arrives in order, so only the chunks in flight
+    are held in memory. Returns the number of blocks written.
+    """
+    exponent = key_e if command == 1 else key_d
+    count = 0
+    with open(in_path, "w", newline="\n") as fin, open(out_path, "w", newline="\n") as fout:
+        fin.write("\n".join(header_lines(key_n, key_e, key_d, command, window_size)))
+
+        def feed():
+            # Like the existing files: newline-separated, no newline after the last block
+            for m in messages:
+                fin.write(f"\n{m:0{BLOCK_HEX}x}")
+                yield m
+
+        for result in golden_outputs(feed(), exponent, key_n, workers=workers, chunk_size=chunk_size):
+            fout.write(f"\n{result:0{BLOCK_HEX}x}" if count else f"{result:0{BLOCK_HEX}x}")
+            count += 1
+    return count
+
+
+def vector_paths(folder, name, command, testcase_id):
+    """
+    (input, expected output) paths for one rsa_accelerator_tb.vhd testcase:
+    ids 0..2 encrypt pt{id}_in -> ct{id}_out, ids 3..5 decrypt ct{id}_in -> pt{id}_out.
+    """
+    if (command == 1) != (testcase_id < 3):
+        raise ValueError(f"Testcase {testcase_id} does not run command {command} in rsa_accelerator_tb")
+    src, dst = ("pt", "ct") if command == 1 else ("ct", "pt")
+    return (os.path.join(folder, f"{name}.inp_messages.hex_{src}{testcase_id}_in.txt"),
+            os.path.join(folder, f"{name}.otp_messages.hex_{dst}{testcase_id}_out.txt"))
+
+
+# -----------------------------
+# Simple test
+# -----------------------------
+if __name__ == "__main__":
+    import filecmp
+    import tempfile
+    import time
+
+    from hex_vectors import read_blocks, read_header, test_files
+
+    key_n = 0x99925173ad65686715385ea800cd28120288fc70a9bc98dd4c90d676f8ff768d
+    key_e = 0x0000000000000000000000000000000000000000000000000000000000010001
+    key_d = 0x0cea1651ef44be1f1f1476b7539bed10d73e3aac782bd9999a1e5a790932bfe9
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Regenerate the checked-in files byte for byte
+        for path in test_files():
+            header = read_header(path)
+            blocks = read_blocks(path)
+            testcase_id = int(path[-len("_in.txt") - 1])
+            in_path, out_path = vector_paths(tmp, "long_test", header['COMMAND'], testcase_id)
+            assert os.path.basename(in_path) == os.path.basename(path)
+            write_vectors(in_path, out_path, blocks, header['KEY N'], header['KEY E'],
+                          header['KEY D'], header['COMMAND'], workers=1)
+            assert filecmp.cmp(in_path, path, shallow=False), f"{os.path.basename(path)} differs!"
+            exponent = header['KEY E'] if header['COMMAND'] == 1 else header['KEY D']
+            assert read_blocks(in_path) == blocks
+            with open(out_path) as f:
+                assert [int(line, 16) for line in f] == [pow(m, exponent, key_n) for m in blocks]
+        print(f"{len(test_files())} long_test input files regenerated identically")
+
+        # Stress file: decrypt then encrypt round trip
+        count = 20000
+        start = time.time()
+        ct_in, pt_out = vector_paths(tmp, "stress", 0, 3)
+        write_vectors(ct_in, pt_out, random_messages(count, key_n, seed=1), key_n, key_e, key_d, 0)
+        elapsed = time.time() - start
+        pt_in, ct_out = vector_paths(tmp, "stress", 1, 0)
+        with open(pt_out) as f:
+            write_vectors(pt_in, ct_out, (int(line, 16) for line in f), key_n, key_e, key_d, 1)
+        with open(ct_out) as f:
+            assert [int(line, 16) for line in f] == list(random_messages(count, key_n, seed=1))
+        size = os.path.getsize(ct_in) + os.path.getsize(pt_out)
+        print(f"{count} key_d blocks in {elapsed:.2f} s ({count / elapsed:.0f} blocks/s), {size / 2**20:.1f} MiB written")
+    print("Vector generator test passed!")